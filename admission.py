@@ -0,0 +1,200 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+class RateLimited(Exception):
+    """Raised when a client has used up its token bucket."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited for {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Overloaded(Exception):
+    """Raised when a request finds no free slot in time."""
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests a second, bursts of up to ``burst``.
+
+    Only the ``max_clients`` most recently seen clients are tracked; a client
+    that was evicted starts again with a full bucket.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._limited = 0
+
+    def take(self, client):
+        """Spend one of ``client``'s tokens; raises :class:`RateLimited` if it has none."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self._limited += 1
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            raise RateLimited(math.ceil((1 - tokens) / self.rate))
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._buckets), "limited": self._limited}
+
+
+class RouteLimiter:
+    """At most ``limits[route]`` requests in flight per route; never waits."""
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._in_flight = {route: 0 for route in self.limits}
+        self._lock = threading.Lock()
+        self._rejected = 0
+
+    def acquire(self, route):
+        """Take a slot for ``route``; returns False if the route has no limit."""
+        if route not in self.limits:
+            return False
+        with self._lock:
+            if self._in_flight[route] >= self.limits[route]:
+                self._rejected += 1
+                raise Overloaded("Too many concurrent requests for this route, try again later")
+            self._in_flight[route] += 1
+        return True
+
+    def release(self, route):
+        with self._lock:
+            self._in_flight[route] -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": dict(self._in_flight), "rejected": self._rejected}
+
+
+class PriorityGate:
+    """Admits at most ``limit`` requests at once, writes ahead of reads.
+
+    Reads may hold at most ``limit - write_reserve`` slots, so writes always
+    find room, and a waiting write is admitted before any waiting read. At
+    most ``max_waiting`` requests wait, each for at most ``timeout`` seconds;
+    the rest are turned away with :class:`Overloaded` straight away.
+    """
+
+    def __init__(self, limit, write_reserve, max_waiting, timeout):
+        self.limit = limit
+        self.read_limit = max(1, limit - write_reserve)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._reads = 0
+        self._waiting_writes = 0
+        self._waiting_reads = 0
+        self._rejected = 0
+
+    def _has_room(self, write):
+        if write:
+            return self._in_flight < self.limit
+        return self._waiting_writes == 0 and self._in_flight < self.limit and self._reads < self.read_limit
+
+    def acquire(self, write):
+        with self._cond:
+            if not self._has_room(write):
+                if self._waiting_writes + self._waiting_reads >= self.max_waiting:
+                    self._rejected += 1
+                    raise Overloaded("Server busy, try again later")
+                self._wait(write)
+            self._in_flight += 1
+            if not write:
+                self._reads += 1
+
+    def _wait(self, write):
+        # Called with the condition held.
+        if write:
+            self._waiting_writes += 1
+        else:
+            self._waiting_reads += 1
+        try:
+            if not self._cond.wait_for(lambda: self._has_room(write), self.timeout):
+                self._rejected += 1
+                raise Overloaded("Server busy, try again later")
+        finally:
+            if write:
+                self._waiting_writes -= 1
+            else:
+                self._waiting_reads -= 1
+            # Reads held back by this write may go now.
+            self._cond.notify_all()
+
+    def release(self, write):
+        with self._cond:
+            self._in_flight -= 1
+            if not write:
+                self._reads -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "reads": self._reads,
+                "waiting_writes": self._waiting_writes,
+                "waiting_reads": self._waiting_reads,
+                "rejected": self._rejected,
+            }
+
+
+class AdmissionControl:
+    """Runs a request past the rate limiter, its route's limit and the gate.
+
+    Any of the three may be None. ``admit`` returns a callable that gives
+    the request's slots back; ``client`` is only used by the rate limiter.
+    """
+
+    def __init__(self, rate_limiter=None, route_limiter=None, gate=None):
+        self.rate_limiter = rate_limiter
+        self.route_limiter = route_limiter
+        self.gate = gate
+
+    @property
+    def enabled(self):
+        return any(limiter is not None for limiter in (self.rate_limiter, self.route_limiter, self.gate))
+
+    def admit(self, client, route, write):
+        if self.rate_limiter is not None:
+            self.rate_limiter.take(client)
+        route_slot = self.route_limiter is not None and self.route_limiter.acquire(route)
+        if self.gate is not None:
+            try:
+                self.gate.acquire(write)
+            except Overloaded:
+                if route_slot:
+                    self.route_limiter.release(route)
+                raise
+
+        def release():
+            if self.gate is not None:
+                self.gate.release(write)
+            if route_slot:
+                self.route_limiter.release(route)
+
+        return release
+
+    def stats(self):
+        return {
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter is not None else None,
+            "routes": self.route_limiter.stats() if self.route_limiter is not None else None,
+            "gate": self.gate.stats() if self.gate is not None else None,
+        }
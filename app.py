@@ -1,24 +1,296 @@
+import os
 import json
+import copy
+import atexit
+import functools
 import datetime
 import jwt
-from flask import Flask, request, jsonify, abort
-from flask_mysqldb import MySQL
+from flask import Flask, Blueprint, Response, current_app, g, request, jsonify, abort, url_for, stream_with_context, has_request_context
+import MySQLdb
+from MySQLdb.cursors import SSCursor
 from flask_bcrypt import Bcrypt
+from user_store import JsonUserStore, MySQLUserStore
+from password_hashing import PasswordHasher, HashingPoolFull
+from token_cache import TokenCache
+from response_cache import ResponseCache, RedisResponseCache
+from MySQLdb.constants.CLIENT import FOUND_ROWS
+from db_pool import PooledMySQL, PoolTimeout
+import repository
+import positions
+import cash_flows
+from write_behind import GroupCommitter, QueueFull, RedisStatusStore
+from serializers import make_serializer
+from compression import accepts_gzip, compress_response
+from metrics import Metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from slow_queries import SlowQueryLog, make_logger
+from admission import AdmissionControl, RateLimiter, RouteLimiter, PriorityGate, RateLimited, Overloaded
+from repository import EMPLOYEES, CLIENTS, PRODUCTS, TRANSACTIONS, CASH_FLOWS, encode_cursor
+
+CONSISTENCY_HEADER = "X-Consistency-Token"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+DEFAULT_CONFIG = {
+    "MYSQL_HOST": "localhost",
+    "MYSQL_USER": "root",
+    "MYSQL_PASSWORD": "root",
+    "MYSQL_DB": "mini_private_banking",
+    # FOUND_ROWS makes UPDATE report matched rather than changed rows, which the
+    # write handlers use to detect a missing ID without a SELECT.
+    "MYSQL_CUSTOM_OPTIONS": {"client_flag": FOUND_ROWS},
+    "SECRET_KEY": "daless",
+    "DEFAULT_PAGE_LIMIT": 100,
+    "MAX_PAGE_LIMIT": 1000,
+    "STREAM_CHUNK_SIZE": 500,
+    "BULK_BATCH_SIZE": 1000,
+    "USER_STORE": "json",
+    "USERS_FILE": "users.json",
+    "BCRYPT_LOG_ROUNDS": 12,
+    "BCRYPT_POOL_SIZE": os.cpu_count() or 1,
+    "BCRYPT_MAX_PENDING": 32,
+    "BCRYPT_RETRY_AFTER": 1,
+    "TOKEN_CACHE_SIZE": 10000,
+    "CACHED_TABLES": ["employees", "products"],
+    "CACHE_TTL": 60,
+    "CACHE_MAX_ENTRIES": 256,
+    "CACHE_REDIS_URL": None,
+    "MYSQL_POOL_MIN_SIZE": 1,
+    "MYSQL_POOL_MAX_SIZE": 10,
+    "MYSQL_POOL_TIMEOUT": 5,
+    "MYSQL_POOL_RECYCLE": 300,
+    "MYSQL_POOL_PING": True,
+    "MYSQL_REPLICAS": [],
+    "MYSQL_REPLICA_RETRY": 10,
+    "MYSQL_REPLICA_MAX_LAG": None,
+    "MYSQL_REPLICA_CHECK_INTERVAL": 5,
+    "CONSISTENCY_WINDOW": 5,
+    "RATE_LIMIT_PER_SECOND": None,
+    "RATE_LIMIT_BURST": 20,
+    "RATE_LIMIT_MAX_CLIENTS": 10000,
+    # {"GET /transactions": 4, ...}, keyed by method and URL rule.
+    "ADMISSION_ROUTE_LIMITS": {},
+    "ADMISSION_MAX_CONCURRENT": None,
+    "ADMISSION_WRITE_RESERVE": 2,
+    "ADMISSION_MAX_WAITING": 64,
+    "ADMISSION_TIMEOUT": 1,
+    "ADMISSION_EXEMPT": ["/metrics", "/status"],
+    "WRITE_BEHIND_QUEUE_SIZE": 10000,
+    "WRITE_BEHIND_BATCH_SIZE": 500,
+    "WRITE_BEHIND_FLUSH_MS": 50,
+    "WRITE_BEHIND_RETRY_AFTER": 1,
+    "WRITE_BEHIND_STATUS_TTL": 86400,
+    "JSON_SERIALIZER": "template",
+    "COMPRESS_LEVEL": 6,
+    "COMPRESS_MIN_SIZE": 1024,
+    "COMPRESS_MIMETYPES": ["application/json", "application/x-ndjson"],
+    "SLOW_QUERY_LOG": None,
+    "SLOW_QUERY_THRESHOLD_MS": 200,
+    "SLOW_QUERY_EXPLAIN": True,
+    "SLOW_QUERY_LOG_MAX_BYTES": 10 * 1024 * 1024,
+    "SLOW_QUERY_LOG_BACKUPS": 5,
+}
 
-app = Flask(__name__)
-app.config["MYSQL_HOST"] = "localhost"
-app.config["MYSQL_USER"] = "root"
-app.config["MYSQL_PASSWORD"] = "root"
-app.config["MYSQL_DB"] = "mini_private_banking"
-app.config["SECRET_KEY"] = "daless"
+api = Blueprint("api", __name__, cli_group=None)
+mysql = PooledMySQL()
+metrics = Metrics()
+
+# Services (password_hasher, token_cache, response_cache, row_serializer,
+# user_store, admission, slow_query_log, transaction_committer) are built per
+# app by create_app() and kept in app.extensions; handlers find them through
+# current_app, so two apps never share or replace each other's.
+
+def create_response_cache(app):
+    if app.config["CACHE_REDIS_URL"]:
+        return RedisResponseCache(app.config["CACHE_REDIS_URL"], app.config["CACHE_TTL"])
+    return ResponseCache(app.config["CACHE_MAX_ENTRIES"], app.config["CACHE_TTL"])
+
+def explain_query(app, sql, params):
+    # Runs on the slow-query log's own thread, so it borrows a connection
+    # from the pool rather than disturbing the request's cursor.
+    pool = mysql.get_pool(app)
+    conn = pool.acquire()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("EXPLAIN " + sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        pool.release(conn)
+
+def slow_query_context():
+    if not has_request_context():
+        return {}
+    return {
+        "route": request.url_rule.rule if request.url_rule else None,
+        "method": request.method,
+    }
+
+def create_slow_query_log(app):
+    if not app.config["SLOW_QUERY_LOG"]:
+        return None
+    logger = make_logger(
+        app.config["SLOW_QUERY_LOG"],
+        app.config["SLOW_QUERY_LOG_MAX_BYTES"],
+        app.config["SLOW_QUERY_LOG_BACKUPS"],
+    )
+    return SlowQueryLog(
+        logger,
+        app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000,
+        explain=functools.partial(explain_query, app) if app.config["SLOW_QUERY_EXPLAIN"] else None,
+        context=slow_query_context,
+    )
 
-mysql = MySQL(app)
-bcrypt = Bcrypt(app)
+def wrap_slow_queries(cursor):
+    slow_query_log = current_app.extensions["slow_query_log"]
+    if slow_query_log is None:
+        return cursor
+    return slow_query_log.wrap_cursor(cursor)
+
+mysql.cursor_wrappers = [metrics.wrap_cursor, wrap_slow_queries]
+
+def create_user_store(app):
+    if app.config["USER_STORE"] == "mysql":
+        return MySQLUserStore(mysql)
+    return JsonUserStore(app.config["USERS_FILE"])
+
+def create_admission(app):
+    rate_limiter = None
+    if app.config["RATE_LIMIT_PER_SECOND"]:
+        rate_limiter = RateLimiter(
+            app.config["RATE_LIMIT_PER_SECOND"],
+            app.config["RATE_LIMIT_BURST"],
+            app.config["RATE_LIMIT_MAX_CLIENTS"],
+        )
+    route_limiter = None
+    if app.config["ADMISSION_ROUTE_LIMITS"]:
+        route_limiter = RouteLimiter(app.config["ADMISSION_ROUTE_LIMITS"])
+    gate = None
+    if app.config["ADMISSION_MAX_CONCURRENT"]:
+        gate = PriorityGate(
+            app.config["ADMISSION_MAX_CONCURRENT"],
+            app.config["ADMISSION_WRITE_RESERVE"],
+            app.config["ADMISSION_MAX_WAITING"],
+            app.config["ADMISSION_TIMEOUT"],
+        )
+    return AdmissionControl(rate_limiter, route_limiter, gate)
+
+def create_transaction_committer(app):
+    statuses = None
+    if app.config["CACHE_REDIS_URL"]:
+        statuses = RedisStatusStore(app.config["CACHE_REDIS_URL"], app.config["WRITE_BEHIND_STATUS_TTL"])
+    return GroupCommitter(
+        functools.partial(write_transactions_behind, app),
+        app.config["WRITE_BEHIND_QUEUE_SIZE"],
+        app.config["WRITE_BEHIND_BATCH_SIZE"],
+        app.config["WRITE_BEHIND_FLUSH_MS"] / 1000,
+        statuses,
+    )
 
 def handle_error(error_msg, status_code):
     return jsonify({"error": error_msg}), status_code
 
-@app.route("/")
+def handle_retry_later(error_msg, status_code, retry_after):
+    response, status_code = handle_error(error_msg, status_code)
+    response.headers["Retry-After"] = str(retry_after)
+    return response, status_code
+
+@api.before_app_request
+def start_request_metrics():
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.start_request(route, request.method)
+
+@api.after_app_request
+def record_status(response):
+    metrics.set_status(response.status_code)
+    return response
+
+@api.teardown_app_request
+def end_request_metrics(exception):
+    metrics.end_request()
+
+@api.before_app_request
+def admit_request():
+    # Runs after start_request_metrics, so turned-away requests are counted.
+    admission = current_app.extensions["admission"]
+    if not admission.enabled:
+        return None
+    if request.url_rule is None or request.url_rule.rule in current_app.config["ADMISSION_EXEMPT"]:
+        return None
+    client = None
+    if admission.rate_limiter is not None:
+        current_user, _ = validate_token()
+        client = f"user:{current_user['user_id']}" if current_user else f"addr:{request.remote_addr}"
+    # HEAD is served by the GET view, so it shares the GET route's limit.
+    method = "GET" if request.method == "HEAD" else request.method
+    try:
+        g.admission_release = admission.admit(
+            client, f"{method} {request.url_rule.rule}", request.method not in READ_METHODS
+        )
+    except RateLimited as exc:
+        return handle_retry_later("Rate limit exceeded, try again later", 429, exc.retry_after)
+    except Overloaded as exc:
+        return handle_retry_later(str(exc), 503, 1)
+    return None
+
+@api.teardown_app_request
+def release_admission(exception):
+    release = g.pop("admission_release", None)
+    if release is not None:
+        release()
+
+@api.after_app_request
+def compress(response):
+    if response.mimetype not in current_app.config["COMPRESS_MIMETYPES"]:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or request.method == "HEAD"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not accepts_gzip(request.accept_encodings)
+    ):
+        return response
+    compress_response(response, current_app.config["COMPRESS_LEVEL"], current_app.config["COMPRESS_MIN_SIZE"])
+    return response
+
+@api.before_app_request
+def read_consistency_token():
+    token = request.headers.get(CONSISTENCY_HEADER)
+    if not token or not current_app.config["MYSQL_REPLICAS"]:
+        return None
+    try:
+        data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+        g.read_after = (data["table"], data["version"])
+    except jwt.ExpiredSignatureError:
+        # The window is over; any replica will do.
+        return None
+    except Exception:
+        return handle_error("Consistency token is invalid", 400)
+    return None
+
+@api.after_app_request
+def add_consistency_token(response):
+    written = g.get("written")
+    if written is not None:
+        table, version = written
+        response.headers[CONSISTENCY_HEADER] = jwt.encode(
+            {
+                "table": table,
+                "version": version,
+                "exp": datetime.datetime.now(datetime.timezone.utc)
+                + datetime.timedelta(seconds=current_app.config["CONSISTENCY_WINDOW"]),
+            },
+            current_app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+    return response
+
+@api.app_errorhandler(PoolTimeout)
+def handle_pool_timeout(error):
+    return handle_retry_later("Database busy, try again later", 503, 1)
+
+@api.route("/")
 def hello_world():
     return """
     <!DOCTYPE html>
@@ -58,6 +330,7 @@ def hello_world():
         <button onclick="window.location.href='/clients'">Clients</button>
         <button onclick="window.location.href='/products'">Products</button>
         <button onclick="window.location.href='/transactions'">Transactions</button>
+        <button onclick="window.location.href='/cash_flows'">Cash Flows</button>
     </body>
     </html>
     """
@@ -67,13 +340,22 @@ def validate_token():
     token = request.headers.get("x-access-token")
     if not token:
         return None, handle_error("Token is missing!", 401)
+
+    token_cache = current_app.extensions["token_cache"]
+    current_user = token_cache.get(token)
+    if current_user:
+        return current_user, None
+
     try:
-        data = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
+        data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
         current_user = {"user_id": data["user_id"], "role": data["role"]}
-        return current_user, None
     except Exception:
         return None, handle_error("Token is invalid!", 401)
 
+    if "exp" in data:
+        token_cache.put(token, current_user, data["exp"])
+    return current_user, None
+
 def validate_role(current_user, valid_roles):
     if isinstance(valid_roles, str):
         valid_roles = [valid_roles]
@@ -82,47 +364,32 @@ def validate_role(current_user, valid_roles):
         return jsonify({"error": "Unauthorized access"}), 403
     return None
 
-users_data = {
-    "users": []
-}
-
-def save_to_json():
-    with open("users.json", "w") as f:
-        json.dump(users_data, f)
-
-def load_from_json():
-    global users_data
-    try:
-        with open("users.json", "r") as f:
-            users_data = json.load(f)
-    except FileNotFoundError:
-        save_to_json()
-
-@app.route("/register", methods=["POST"])
+@api.route("/register", methods=["POST"])
 def register():
     data = request.get_json()
     if not data or not data.get("username") or not data.get("password") or not data.get("role"):
         return handle_error("Missing required fields: username, password, and role are mandatory", 400)
     
     username = data["username"]
-    password = bcrypt.generate_password_hash(data["password"]).decode("utf-8")
     role = data["role"]
     
     if role not in ["admin", "user"]:
         return handle_error("Invalid role. Must be 'admin' or 'user'", 400)
     
-    load_from_json()
-    for user in users_data["users"]:
-        if user["username"] == username:
-            return handle_error("Username already exists", 400)
+    user_store = current_app.extensions["user_store"]
+    if user_store.get(username):
+        return handle_error("Username already exists", 400)
     
-    new_user = {"username": username, "password": password, "role": role}
-    users_data["users"].append(new_user)
-    save_to_json()
+    try:
+        password = current_app.extensions["password_hasher"].generate_password_hash(data["password"])
+    except HashingPoolFull:
+        return handle_retry_later("Authentication service busy, try again later", 503, current_app.config["BCRYPT_RETRY_AFTER"])
+    if not user_store.add(username, password, role):
+        return handle_error("Username already exists", 400)
     return jsonify({"message": "User registered successfully"}), 201
 
 
-@app.route("/login", methods=["POST"])
+@api.route("/login", methods=["POST"])
 def login():
     data = request.get_json()
     if not data or not data.get("username") or not data.get("password"):
@@ -130,503 +397,620 @@ def login():
     
     username = data["username"]
     password = data["password"]
-    load_from_json()
     
-    for user in users_data["users"]:
-        if user["username"] == username and bcrypt.check_password_hash(user["password"], password):
-            token = jwt.encode(
-                {
-                    "user_id": username,
-                    "role": user["role"],
-                    "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1),
-                },
-                app.config["SECRET_KEY"],
-                algorithm="HS256",
-            )
-            return jsonify({"token": token}), 200
+    user = current_app.extensions["user_store"].get(username)
+    try:
+        password_ok = user is not None and current_app.extensions["password_hasher"].check_password_hash(user["password"], password)
+    except HashingPoolFull:
+        return handle_retry_later("Authentication service busy, try again later", 503, current_app.config["BCRYPT_RETRY_AFTER"])
+    if password_ok:
+        token = jwt.encode(
+            {
+                "user_id": username,
+                "role": user["role"],
+                "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1),
+            },
+            current_app.config["SECRET_KEY"],
+            algorithm="HS256",
+        )
+        return jsonify({"token": token}), 200
     
     return handle_error("Invalid credentials", 401)
 
 
-@app.route("/employees")
-def get_employees():
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM employees")
-    employees = cursor.fetchall()
-    if not employees:
-        return handle_error("No employees found", 404)
-    
-    employees_list = [
-        {
-            "employee_ID": employee[0], 
-            "name": employee[1]
-        }
-        for employee in employees
-    ]
-    
-    return jsonify(employees_list), 200
-
-@app.route("/clients")
-def get_clients():
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM clients")
-    clients = cursor.fetchall()
-    if not clients:
-        return handle_error("No clients found", 404)
-
-    clients_list = [
-        {
-            "client_ID": client[0], 
-            "name": client[1], 
-            "email": client[2], 
-            "phone": client[3],
-            "client_Manager_Employee_ID": client[4]
-        }
-        for client in clients
-    ]
-    
-    return jsonify(clients_list), 200
+@api.route("/status")
+def status():
+    services = current_app.extensions
+    return jsonify({
+        "auth_pool": services["password_hasher"].stats(),
+        "token_cache": services["token_cache"].stats(),
+        "response_cache": services["response_cache"].stats(),
+        "db_pool": mysql.stats(),
+        "db_replicas": mysql.replica_stats(),
+        "write_behind": services["transaction_committer"].stats(),
+        "slow_queries": services["slow_query_log"].stats() if services["slow_query_log"] is not None else None,
+        "admission": services["admission"].stats(),
+    }), 200
 
-@app.route("/products")
-def get_products():
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM products")
-    products = cursor.fetchall()
-    if not products:
-        return handle_error("No products found", 404)
 
-    products_list = [
-        {
-            "product_ID": product[0], 
-            "product_Type": product[1]
-        }
-        for product in products
-    ]
-    
-    return jsonify(products_list), 200
+@api.route("/metrics")
+def get_metrics():
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
-@app.route("/transactions")
-def get_transactions():
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM transactions")
-    transactions = cursor.fetchall()
-    if not transactions:
-        return handle_error("No transactions found", 404)
 
-    transactions_list = [
-        {
-            "transaction_ID": transaction[0],
-            "client_ID": transaction[1], 
-            "product_ID": transaction[2], 
-            "transaction_Amount": transaction[3], 
-            "transaction_Date": transaction[4]
-        }
-        for transaction in transactions
-    ]
-    
-    return jsonify(transactions_list), 200
-
-@app.route("/employees", methods=["POST"])
-def add_employee():
-    current_user, error = validate_token()
+def get_page_args():
+    limit, after_id, error = repository.parse_page_args(
+        request.args, current_app.config["DEFAULT_PAGE_LIMIT"], current_app.config["MAX_PAGE_LIMIT"]
+    )
     if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-    
-    data = request.get_json()
-    employee_id = data.get('employee_ID')
-    name = data.get('name')
-    
-    if not employee_id or not name:
-        return handle_error("Employee ID and name are required", 400)
-    
-    cursor = mysql.connection.cursor()
-    cursor.execute("INSERT INTO employees (Employee_ID, Name) VALUES (%s, %s)", (employee_id, name))
-    mysql.connection.commit()
-
-    cursor.execute("SELECT * FROM employees WHERE Employee_ID = %s", (employee_id,))
-    employee = cursor.fetchone()
-
-    if not employee:
-        return handle_error("Failed to retrieve the added employee", 500)
-
-    return jsonify({
-        "employee_ID": employee[0], 
-        "name": employee[1]
-    }), 201
-
-@app.route("/clients", methods=["POST"])
-def add_client():
-    current_user, error = validate_token()
+        return None, None, handle_error(error, 400)
+    return limit, after_id, None
+
+def read_connection():
+    """Connection for GET handlers: a replica, unless the caller's consistency
+    token asks for data the replicas have not caught up with yet."""
+    read_after = g.get("read_after")
+    if read_after is None:
+        return mysql.read_connection()
+    return mysql.read_connection(functools.partial(replica_caught_up, *read_after))
+
+def replica_caught_up(table, version, conn):
+    cursor = conn.cursor()
+    try:
+        return (get_table_version(cursor, table) or 0) >= version
+    finally:
+        cursor.close()
+
+def execute_page_query(cursor, resource, selected, conditions, after_id, limit, includes=()):
+    cursor.execute(*repository.page_query(resource, selected, conditions, after_id, limit, includes))
+
+def wants_stream():
+    if request.args.get("stream") == "1":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+def stream_resource(resource, selected, keys, conditions, limit, after_id, includes=()):
+    # An unbuffered server-side cursor lets MySQL hand rows over as we read
+    # them instead of materialising the whole result set in the client.
+    cursor = read_connection().cursor(SSCursor)
+    execute_page_query(cursor, resource, selected, conditions, after_id, limit, includes)
+    nested = resource.nested_layout(selected, includes)
+
+    chunk_size = current_app.config["STREAM_CHUNK_SIZE"]
+    row_serializer = current_app.extensions["row_serializer"]
+    first_chunk = cursor.fetchmany(chunk_size)
+    empty_error = repository.empty_page_error(resource, first_chunk, after_id)
+    if empty_error:
+        cursor.close()
+        return handle_error(empty_error, 404)
+
+    def generate():
+        try:
+            rows = first_chunk
+            while rows:
+                yield "".join([row_serializer.row(selected, keys, row, nested) + "\n" for row in rows])
+                rows = cursor.fetchmany(chunk_size)
+        finally:
+            cursor.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson"), 200
+
+def list_resource(resource):
+    table = resource.table
+    limit, after_id, error = get_page_args()
     if error:
         return error
-     
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-       
-    data = request.get_json()
-    client_id = data.get('client_ID')
-    name = data.get('name')
-    email = data.get('email')
-    phone = data.get('phone')
-    client_manager_employee_id = data.get('client_Manager_Employee_ID')
-
-    if not all([client_id, name, email, phone, client_manager_employee_id]):
-        return handle_error("Missing required fields", 400)
-    
-    cursor = mysql.connection.cursor()
-    cursor.execute(
-        "INSERT INTO clients (Client_ID, Name, Email, Phone, Client_Manager_Employee_ID) VALUES (%s, %s, %s, %s, %s)", 
-        (client_id, name, email, phone, client_manager_employee_id)
+
+    keys, fields_error = resource.parse_fields(request.args.get("fields"))
+    if fields_error:
+        return handle_error(fields_error, 400)
+    selected = resource.projection(keys)
+
+    includes, include_error = resource.parse_includes(request.args.get("include"))
+    if include_error:
+        return handle_error(include_error, 400)
+
+    conditions, filter_error = resource.parse_filters(request.args, qualified=bool(includes))
+    if filter_error:
+        return handle_error(filter_error, 400)
+
+    if wants_stream():
+        # Streams run to the end of the table unless the caller asks for a limit.
+        if "limit" not in request.args:
+            limit = None
+        return stream_resource(resource, selected, keys, conditions, limit, after_id, includes)
+
+    # Cache entries are invalidated per table, which would miss changes to
+    # the included ones, so responses with includes are not cached. Callers
+    # reading their own writes skip it too, since a lagging replica may have
+    # refilled it.
+    response_cache = current_app.extensions["response_cache"]
+    cache_key = None
+    if table in current_app.config["CACHED_TABLES"] and not includes and "read_after" not in g:
+        cache_key = request.query_string.decode("utf-8")
+        cached, cache_generation = response_cache.get(table, cache_key)
+        if cached is not None:
+            return page_response(*cached)
+
+    # The version row is a primary-key lookup, so an unchanged table costs
+    # one tiny query instead of the page SELECT and its serialization.
+    cursor = read_connection().cursor()
+    if includes:
+        version = get_table_versions(cursor, [table] + [relation.target.table for relation in includes])
+    else:
+        version = get_table_version(cursor, table)
+    etag = repository.page_etag(table, version, request.query_string)
+    if etag and request.if_none_match.contains_weak(etag):
+        return not_modified_response(etag)
+
+    # Fetch one row past the page so we know whether a next page exists
+    # without a separate COUNT(*).
+    execute_page_query(cursor, resource, selected, conditions, after_id, limit + 1, includes)
+    rows, next_args, empty_error = repository.trim_page(
+        resource, cursor.fetchall(), limit, after_id, request.args.to_dict()
     )
+    if empty_error:
+        return handle_error(empty_error, 404)
+    body = current_app.extensions["row_serializer"].rows(selected, keys, rows, resource.nested_layout(selected, includes))
+
+    next_link = None
+    if next_args:
+        next_link = f'<{url_for(request.endpoint, **next_args)}>; rel="next"'
+
+    if cache_key is not None:
+        response_cache.set(table, cache_key, [body, next_link, etag], cache_generation)
+    return page_response(body, next_link, etag)
+
+def page_response(body, next_link, etag):
+    if etag and request.if_none_match.contains_weak(etag):
+        return not_modified_response(etag)
+    response = Response(body, mimetype="application/json")
+    if next_link:
+        response.headers["Link"] = next_link
+    if etag:
+        response.set_etag(etag)
+    return response, 200
+
+def not_modified_response(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response, 304
+
+def get_table_version(cursor, table):
+    cursor.execute("SELECT Version FROM table_versions WHERE Table_Name = %s", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_table_versions(cursor, tables):
+    """One version string covering ``tables``, or None if any is untracked."""
+    cursor.execute(*repository.versions_query(tables))
+    return repository.combine_versions(tables, cursor.fetchall())
+
+def bump_table_version(cursor, table):
+    cursor.execute("UPDATE table_versions SET Version = Version + 1 WHERE Table_Name = %s", (table,))
+
+def invalidate_cached(table):
+    if table in current_app.config["CACHED_TABLES"]:
+        current_app.extensions["response_cache"].invalidate(table)
+
+def commit_write(cursor, table):
+    bump_table_version(cursor, table)
+    if current_app.config["MYSQL_REPLICAS"]:
+        # The new version goes back as a consistency token.
+        g.written = (table, get_table_version(cursor, table))
     mysql.connection.commit()
+    invalidate_cached(table)
 
-    cursor.execute("SELECT * FROM clients WHERE Client_ID = %s", (client_id,))
-    client = cursor.fetchone()
-
-    if not client:
-        return handle_error("Failed to retrieve the added client", 500)
+def insert_transaction_rows(cursor, rows):
+    cursor.executemany(TRANSACTIONS.insert_sql, rows)
+    positions.add_transactions(cursor, rows)
 
-    return jsonify({
-        "client_ID": client[0], 
-        "name": client[1], 
-        "email": client[2], 
-        "phone": client[3],
-        "client_Manager_Employee_ID": client[4]
-    }), 201
-
-@app.route("/products", methods=["POST"])
-def add_product():
+def require_admin():
     current_user, error = validate_token()
     if error:
         return error
-    
+
     required_role = "admin"
     role_error = validate_role(current_user, required_role)
     if role_error:
-        return role_error 
-   
-
-    data = request.get_json()
-    product_id = data.get('product_ID')
-    product_type = data.get('product_Type')
-
-    if not all([product_id, product_type]):
-        return handle_error("Missing required fields", 400)
-
-    cursor = mysql.connection.cursor()
-    cursor.execute(
-        "INSERT INTO products (Product_ID, Product_Type) VALUES (%s, %s)", 
-        (product_id, product_type)
-    )
-    mysql.connection.commit()
-
-    cursor.execute("SELECT * FROM products WHERE Product_ID = %s", (product_id,))
-    product = cursor.fetchone()
+        return role_error
+    return None
 
-    if not product:
-        return handle_error("Failed to retrieve the added product", 500)
+def wants_full_return():
+    return request.args.get("return") == "full"
 
-    return jsonify({
-        "product_ID": product[0], 
-        "product_Type": product[1]
-    }), 201
+def create_resource(resource):
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
 
-@app.route("/transactions", methods=["POST"])
-def add_transaction():
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-   
-  
     data = request.get_json()
-    transaction_id = data.get('transaction_ID')
-    client_id = data.get('client_ID')
-    product_id = data.get('product_ID')
-    transaction_amount = data.get('transaction_Amount')
-    transaction_date = data.get('transaction_Date')
-
-    if not all([transaction_id, client_id, product_id, transaction_amount, transaction_date]):
-        return handle_error("Missing required fields", 400)
+    values, validation_error = repository.validate(resource, data)
+    if validation_error:
+        return handle_error(validation_error, 400)
 
     cursor = mysql.connection.cursor()
-    cursor.execute(
-        "INSERT INTO transactions (Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date) VALUES (%s, %s, %s, %s, %s)",
-        (transaction_id, client_id, product_id, transaction_amount, transaction_date)
-    )
-    mysql.connection.commit()
-
-    cursor.execute("SELECT * FROM transactions WHERE Transaction_ID = %s", (transaction_id,))
-    transaction = cursor.fetchone()
+    repository.insert(cursor, resource, values)
+    if resource is TRANSACTIONS:
+        positions.add_transactions(cursor, [values])
+    commit_write(cursor, resource.table)
+
+    if wants_full_return():
+        row = repository.fetch(cursor, resource, values[0])
+        if not row:
+            return handle_error(f"Failed to retrieve the added {resource.label.lower()}", 500)
+        return jsonify(resource.to_dict(row)), 201
+    return jsonify(resource.to_dict(values)), 201
+
+def update_resource(resource, resource_id):
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
 
-    if not transaction:
-        return handle_error("Failed to retrieve the added transaction", 500)
-
-    return jsonify({
-        "transaction_ID": transaction[0], 
-        "client_ID": transaction[1], 
-        "product_ID": transaction[2], 
-        "transaction_Amount": transaction[3], 
-        "transaction_Date": transaction[4]
-    }), 201
-
-@app.route("/employees/<int:employee_id>", methods=["PUT"])
-def update_employee(employee_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-   
-  
     data = request.get_json()
-    name = data.get('name')
-
-    if not name:
-        return handle_error("Name is required", 400)
+    values, validation_error = repository.validate(resource, data, with_id=False)
+    if validation_error:
+        return handle_error(validation_error, 400)
 
     cursor = mysql.connection.cursor()
-    cursor.execute(
-        "UPDATE employees SET Name = %s WHERE Employee_ID = %s", 
-        (name, employee_id)
-    )
-    mysql.connection.commit()
-
-    cursor.execute("SELECT * FROM employees WHERE Employee_ID = %s", (employee_id,))
-    employee = cursor.fetchone()
-
-    if not employee:
-        return handle_error("Employee not found", 404)
-
-    return jsonify({
-        "employee_ID": employee[0], 
-        "name": employee[1]
-    }), 200
+    if resource is TRANSACTIONS:
+        positions.reverse_transaction(cursor, resource_id)
+    if not repository.update(cursor, resource, resource_id, values):
+        mysql.connection.rollback()
+        return handle_error(f"{resource.label} not found", 404)
+    if resource is TRANSACTIONS:
+        positions.add_transactions(cursor, [(resource_id,) + values])
+    commit_write(cursor, resource.table)
+
+    if wants_full_return():
+        row = repository.fetch(cursor, resource, resource_id)
+        if not row:
+            return handle_error(f"{resource.label} not found", 404)
+        return jsonify(resource.to_dict(row)), 200
+    return jsonify(resource.to_dict((resource_id,) + values)), 200
+
+def delete_resource(resource, resource_id):
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
 
-@app.route("/clients/<int:client_id>", methods=["PUT"])
-def update_client(client_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-   
-  
-    data = request.get_json()
-    name = data.get('name')
-    email = data.get('email')
-    phone = data.get('phone')
-    client_manager_employee_id = data.get('client_Manager_Employee_ID')
+    cursor = mysql.connection.cursor()
+    if resource is TRANSACTIONS:
+        positions.reverse_transaction(cursor, resource_id)
+    if not repository.delete(cursor, resource, resource_id):
+        mysql.connection.rollback()
+        return handle_error(f"{resource.label} not found", 404)
+    commit_write(cursor, resource.table)
 
-    if not all([name, email, phone, client_manager_employee_id]):
-        return handle_error("Missing required fields", 400)
+    return jsonify({"message": f"{resource.label} with ID {resource_id} has been deleted."}), 200
 
-    cursor = mysql.connection.cursor()
-    cursor.execute(
-        "UPDATE clients SET Name = %s, Email = %s, Phone = %s, Client_Manager_Employee_ID = %s WHERE Client_ID = %s", 
-        (name, email, phone, client_manager_employee_id, client_id)
-    )
-    mysql.connection.commit()
+@api.route("/employees")
+def get_employees():
+    return list_resource(EMPLOYEES)
 
-    cursor.execute("SELECT * FROM clients WHERE Client_ID = %s", (client_id,))
-    client = cursor.fetchone()
+@api.route("/clients")
+def get_clients():
+    return list_resource(CLIENTS)
 
-    if not client:
-        return handle_error("Client not found", 404)
+@api.route("/products")
+def get_products():
+    return list_resource(PRODUCTS)
 
-    return jsonify({
-        "client_ID": client[0], 
-        "name": client[1], 
-        "email": client[2], 
-        "phone": client[3],
-        "client_Manager_Employee_ID": client[4]
-    }), 200
+@api.route("/transactions")
+def get_transactions():
+    return list_resource(TRANSACTIONS)
 
-@app.route("/products/<int:product_id>", methods=["PUT"])
-def update_product(product_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-   
-    data = request.get_json()
-    product_type = data.get('product_Type')
+@api.route("/clients/<int:client_id>/positions")
+def get_client_positions(client_id):
+    cursor = read_connection().cursor()
+    rows = positions.get_positions(cursor, client_id)
+    if not rows:
+        return handle_error("No positions found", 404)
 
-    if not product_type:
-        return handle_error("Product Type is required", 400)
+    return jsonify([
+        {
+            "product_ID": row[0],
+            "position_Amount": row[1],
+            "transaction_Count": row[2]
+        }
+        for row in rows
+    ]), 200
 
+@api.cli.command("rebuild-positions")
+def rebuild_positions_command():
+    """Recompute client_positions from the transactions table."""
     cursor = mysql.connection.cursor()
-    cursor.execute(
-        "UPDATE products SET Product_Type = %s WHERE Product_ID = %s", 
-        (product_type, product_id)
-    )
+    positions.rebuild(cursor)
     mysql.connection.commit()
+    print("client_positions rebuilt")
+
+@api.route("/cash_flows")
+def get_cash_flows():
+    return list_resource(CASH_FLOWS)
+
+@api.route("/cash_flows", methods=["POST"])
+def add_cash_flows():
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
+
+    data = request.get_json(silent=True)
+    items = data if isinstance(data, list) else [data]
+    rows = []
+    errors = []
+    for index, item in enumerate(items):
+        values, validation_error = cash_flows.prepare(item)
+        if validation_error:
+            errors.append({"index": index, "error": validation_error})
+        else:
+            rows.append(values)
+    if errors:
+        if not isinstance(data, list):
+            return handle_error(errors[0]["error"], 400)
+        return jsonify({"error": "Invalid cash flows", "errors": errors}), 400
+    if not rows:
+        return handle_error("No cash flows provided", 400)
 
-    cursor.execute("SELECT * FROM products WHERE Product_ID = %s", (product_id,))
-    product = cursor.fetchone()
-
-    if not product:
-        return handle_error("Product not found", 404)
+    cursor = mysql.connection.cursor()
+    try:
+        cash_flows.record(cursor, rows, current_app.config["BULK_BATCH_SIZE"])
+    except MySQLdb.IntegrityError as exc:
+        mysql.connection.rollback()
+        return handle_error(db_error_message(exc), 409)
+    commit_write(cursor, CASH_FLOWS.table)
+
+    if not isinstance(data, list):
+        return jsonify(CASH_FLOWS.to_dict(rows[0])), 201
+    return jsonify({"inserted": len(rows)}), 201
+
+@api.route("/cash_flows/<int:cash_flow_id>", methods=["PUT", "DELETE"])
+def modify_cash_flow(cash_flow_id):
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
+
+    response, status_code = handle_error("Cash flows are append-only; post an offsetting cash flow instead", 405)
+    response.headers["Allow"] = "GET, POST"
+    return response, status_code
+
+@api.route("/cash_flows/summary")
+def get_cash_flow_summary():
+    granularity = request.args.get("granularity", "day")
+    if granularity not in cash_flows.GRANULARITIES:
+        return handle_error("granularity must be 'day' or 'month'", 400)
+
+    conditions, filter_error = repository.parse_filters(cash_flows.SUMMARY_FILTERS, request.args)
+    if filter_error:
+        return handle_error(filter_error, 400)
+
+    cursor = read_connection().cursor()
+    rows = cash_flows.summary(cursor, granularity, conditions)
+    if not rows:
+        return handle_error("No cash flows found", 404)
+
+    return jsonify([
+        {
+            "client_ID": row[0],
+            "period_Start": row[1],
+            "total_Amount": row[2],
+            "flow_Count": row[3]
+        }
+        for row in rows
+    ]), 200
 
-    return jsonify({
-        "product_ID": product[0], 
-        "product_Type": product[1]
-    }), 200
+@api.route("/employees", methods=["POST"])
+def add_employee():
+    return create_resource(EMPLOYEES)
 
-@app.route("/transactions/<int:transaction_id>", methods=["PUT"])
-def update_transaction(transaction_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-     
-    data = request.get_json()
-    client_id = data.get('client_ID')
-    product_id = data.get('product_ID')
-    transaction_amount = data.get('transaction_Amount')
-    transaction_date = data.get('transaction_Date')
+@api.route("/clients", methods=["POST"])
+def add_client():
+    return create_resource(CLIENTS)
 
-    if not all([client_id, product_id, transaction_amount, transaction_date]):
-        return handle_error("Missing required fields", 400)
+@api.route("/products", methods=["POST"])
+def add_product():
+    return create_resource(PRODUCTS)
 
-    cursor = mysql.connection.cursor()
-    cursor.execute(
-        "UPDATE transactions SET Client_ID = %s, Product_ID = %s, Transaction_Amount = %s, Transaction_Date = %s WHERE Transaction_ID = %s",
-        (client_id, product_id, transaction_amount, transaction_date, transaction_id)
-    )
-    mysql.connection.commit()
+@api.route("/transactions", methods=["POST"])
+def add_transaction():
+    if request.args.get("async") == "1":
+        return enqueue_transaction()
+    return create_resource(TRANSACTIONS)
+
+def write_transactions_behind(app, rows):
+    # Runs on the committer thread, outside any request, so it borrows a
+    # connection from the pool directly.
+    with app.app_context():
+        pool = mysql.get_pool(app)
+        conn = pool.acquire()
+        try:
+            cursor = conn.cursor()
+            insert_transaction_rows(cursor, rows)
+            bump_table_version(cursor, TRANSACTIONS.table)
+            conn.commit()
+        finally:
+            pool.release(conn)
+        # The rows are committed now; a failure past this point must not
+        # make the committer retry them and report them failed.
+        try:
+            invalidate_cached(TRANSACTIONS.table)
+        except Exception:
+            app.logger.exception("could not invalidate the %s cache after a group commit", TRANSACTIONS.table)
+
+def enqueue_transaction():
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
 
-    cursor.execute("SELECT * FROM transactions WHERE Transaction_ID = %s", (transaction_id,))
-    transaction = cursor.fetchone()
+    data = request.get_json()
+    values, validation_error = repository.validate(TRANSACTIONS, data)
+    if validation_error:
+        return handle_error(validation_error, 400)
 
-    if not transaction:
-        return handle_error("Transaction not found", 404)
+    try:
+        tracking_id = current_app.extensions["transaction_committer"].submit(values)
+    except QueueFull:
+        return handle_retry_later("Transaction queue is full, try again later", 503, current_app.config["WRITE_BEHIND_RETRY_AFTER"])
+
+    response = jsonify({"tracking_ID": tracking_id, "status": "queued"})
+    response.headers["Location"] = url_for(".get_transaction_status", tracking_id=tracking_id)
+    return response, 202
+
+@api.route("/transactions/async/<tracking_id>")
+def get_transaction_status(tracking_id):
+    status = current_app.extensions["transaction_committer"].status(tracking_id)
+    if status is None:
+        return handle_error("Unknown tracking ID", 404)
+    return jsonify({"tracking_ID": tracking_id, **status}), 200
+
+def db_error_message(exc):
+    return str(exc.args[1]) if len(exc.args) > 1 else str(exc)
+
+@api.route("/transactions/bulk", methods=["POST"])
+def add_transactions_bulk():
+    auth_error = require_admin()
+    if auth_error:
+        return auth_error
 
-    return jsonify({
-        "transaction_ID": transaction[0], 
-        "client_ID": transaction[1], 
-        "product_ID": transaction[2], 
-        "transaction_Amount": transaction[3], 
-        "transaction_Date": transaction[4]
-    }), 200
+    try:
+        batch_size = int(request.args.get("batch_size", current_app.config["BULK_BATCH_SIZE"]))
+    except ValueError:
+        return handle_error("batch_size must be an integer", 400)
+    if batch_size < 1:
+        return handle_error("batch_size must be positive", 400)
+
+    if request.mimetype == "application/x-ndjson":
+        items = iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return handle_error("Request body must be a JSON array or NDJSON", 400)
+        items = ((item, None) for item in data)
 
-@app.route("/employees/<int:employee_id>", methods=["DELETE"])
-def delete_employee(employee_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-     
     cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM employees WHERE Employee_ID = %s", (employee_id,))
-    employee = cursor.fetchone()
-
-    if not employee:
-        return handle_error("Employee not found", 404)
-
-    cursor.execute("DELETE FROM employees WHERE Employee_ID = %s", (employee_id,))
-    mysql.connection.commit()
+    inserted = 0
+    errors = []
+    batch = []
+    total = 0
+    for index, (item, parse_error) in enumerate(items):
+        total += 1
+        if parse_error:
+            errors.append({"index": index, "error": parse_error})
+            continue
+        values, validation_error = repository.validate(TRANSACTIONS, item)
+        if validation_error:
+            errors.append({"index": index, "error": validation_error})
+            continue
+        batch.append((index, values))
+        if len(batch) >= batch_size:
+            inserted += insert_transaction_batch(cursor, batch, errors)
+            batch = []
+    if batch:
+        inserted += insert_transaction_batch(cursor, batch, errors)
+
+    if total == 0:
+        return handle_error("No transactions provided", 400)
+
+    errors.sort(key=lambda e: e["index"])
+    status_code = 207 if errors else 201
+    return jsonify({"inserted": inserted, "failed": len(errors), "errors": errors}), status_code
+
+def iter_ndjson(stream):
+    # Lines are parsed as they are read so a large feed is never held in
+    # memory in full. Blank lines are skipped.
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, "Invalid JSON"
+
+def insert_transaction_batch(cursor, batch, errors):
+    try:
+        insert_transaction_rows(cursor, [values for _, values in batch])
+        commit_write(cursor, TRANSACTIONS.table)
+        return len(batch)
+    except MySQLdb.Error:
+        mysql.connection.rollback()
+
+    # Something in the batch was rejected; replay it row by row in a single
+    # transaction so only the offending rows are reported.
+    inserted = []
+    for index, values in batch:
+        try:
+            cursor.execute(TRANSACTIONS.insert_sql, values)
+            inserted.append(values)
+        except MySQLdb.Error as exc:
+            errors.append({"index": index, "error": db_error_message(exc)})
+    if inserted:
+        positions.add_transactions(cursor, inserted)
+        commit_write(cursor, TRANSACTIONS.table)
+    else:
+        mysql.connection.rollback()
+    return len(inserted)
+
+@api.route("/employees/<int:employee_id>", methods=["PUT"])
+def update_employee(employee_id):
+    return update_resource(EMPLOYEES, employee_id)
 
-    return jsonify({"message": f"Employee with ID {employee_id} has been deleted."}), 200
+@api.route("/clients/<int:client_id>", methods=["PUT"])
+def update_client(client_id):
+    return update_resource(CLIENTS, client_id)
 
-@app.route("/clients/<int:client_id>", methods=["DELETE"])
-def delete_client(client_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-     
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM clients WHERE Client_ID = %s", (client_id,))
-    client = cursor.fetchone()
+@api.route("/products/<int:product_id>", methods=["PUT"])
+def update_product(product_id):
+    return update_resource(PRODUCTS, product_id)
 
-    if not client:
-        return handle_error("Client not found", 404)
+@api.route("/transactions/<int:transaction_id>", methods=["PUT"])
+def update_transaction(transaction_id):
+    return update_resource(TRANSACTIONS, transaction_id)
 
-    cursor.execute("DELETE FROM clients WHERE Client_ID = %s", (client_id,))
-    mysql.connection.commit()
+@api.route("/employees/<int:employee_id>", methods=["DELETE"])
+def delete_employee(employee_id):
+    return delete_resource(EMPLOYEES, employee_id)
 
-    return jsonify({"message": f"Client with ID {client_id} has been deleted."}), 200
+@api.route("/clients/<int:client_id>", methods=["DELETE"])
+def delete_client(client_id):
+    return delete_resource(CLIENTS, client_id)
 
-@app.route("/products/<int:product_id>", methods=["DELETE"])
+@api.route("/products/<int:product_id>", methods=["DELETE"])
 def delete_product(product_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-     
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-    
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM products WHERE Product_ID = %s", (product_id,))
-    product = cursor.fetchone()
+    return delete_resource(PRODUCTS, product_id)
 
-    if not product:
-        return handle_error("Product not found", 404)
+@api.route("/transactions/<int:transaction_id>", methods=["DELETE"])
+def delete_transaction(transaction_id):
+    return delete_resource(TRANSACTIONS, transaction_id)
 
-    cursor.execute("DELETE FROM products WHERE Product_ID = %s", (product_id,))
-    mysql.connection.commit()
 
-    return jsonify({"message": f"Product with ID {product_id} has been deleted."}), 200
+def create_app(config=None):
+    """Build the app: defaults, then ``BANKING_*`` environment variables, then ``config``."""
+    app = Flask(__name__)
+    app.config.update(copy.deepcopy(DEFAULT_CONFIG))
+    app.config.from_prefixed_env("BANKING")
+    app.config.update(config or {})
 
-@app.route("/transactions/<int:transaction_id>", methods=["DELETE"])
-def delete_transaction(transaction_id):
-    current_user, error = validate_token()
-    if error:
-        return error
-    
-    required_role = "admin"
-    role_error = validate_role(current_user, required_role)
-    if role_error:
-        return role_error 
-     
-    cursor = mysql.connection.cursor()
-    cursor.execute("SELECT * FROM transactions WHERE Transaction_ID = %s", (transaction_id,))
-    transaction = cursor.fetchone()
+    mysql.init_app(app)
+    app.extensions["password_hasher"] = PasswordHasher(
+        Bcrypt(app), app.config["BCRYPT_POOL_SIZE"], app.config["BCRYPT_MAX_PENDING"]
+    )
+    app.extensions["token_cache"] = TokenCache(app.config["TOKEN_CACHE_SIZE"])
+    app.extensions["response_cache"] = create_response_cache(app)
+    app.extensions["row_serializer"] = make_serializer(app.config["JSON_SERIALIZER"])
+    app.extensions["user_store"] = create_user_store(app)
+    app.extensions["admission"] = create_admission(app)
+    app.extensions["slow_query_log"] = create_slow_query_log(app)
 
-    if not transaction:
-        return handle_error("Transaction not found", 404)
+    transaction_committer = create_transaction_committer(app)
+    atexit.register(transaction_committer.stop)
+    app.extensions["transaction_committer"] = transaction_committer
 
-    cursor.execute("DELETE FROM transactions WHERE Transaction_ID = %s", (transaction_id,))
-    mysql.connection.commit()
+    app.register_blueprint(api)
+    return app
 
-    return jsonify({"message": f"Transaction with ID {transaction_id} has been deleted."}), 200
 
+app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
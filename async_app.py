@@ -0,0 +1,331 @@
+"""ASGI variant of the read API.
+
+Serves the list endpoints (with ``fields``, ``include``, filters, keyset
+pagination, ``ETag``/``304``, NDJSON streaming and gzip), client positions
+and the cash-flow summary from async handlers, so a slow query parks a
+coroutine instead of a worker thread. Query building, validation and
+serialization are the same code the Flask app uses; writes stay on the
+Flask app. Run it with any ASGI server, e.g.::
+
+    uvicorn async_app:app
+"""
+import re
+import json
+import asyncio
+from urllib.parse import parse_qsl, urlencode
+
+from werkzeug.datastructures import Headers, MultiDict, MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+import repository
+import positions
+import cash_flows
+from async_db import AiomysqlDatabase
+from compression import GzipStream, accepts_gzip, gzip_bytes
+from serializers import make_serializer
+from repository import EMPLOYEES, CLIENTS, PRODUCTS, TRANSACTIONS, CASH_FLOWS
+
+DEFAULT_CONFIG = {
+    "MYSQL_HOST": "localhost",
+    "MYSQL_USER": "root",
+    "MYSQL_PASSWORD": "root",
+    "MYSQL_DB": "mini_private_banking",
+    "MYSQL_POOL_MIN_SIZE": 1,
+    "MYSQL_POOL_MAX_SIZE": 10,
+    "DEFAULT_PAGE_LIMIT": 100,
+    "MAX_PAGE_LIMIT": 1000,
+    "STREAM_CHUNK_SIZE": 500,
+    "JSON_SERIALIZER": "template",
+    "COMPRESS_LEVEL": 6,
+    "COMPRESS_MIN_SIZE": 1024,
+    "COMPRESS_MIMETYPES": ["application/json", "application/x-ndjson"],
+}
+
+POSITION_KEYS = ["product_ID", "position_Amount", "transaction_Count"]
+SUMMARY_KEYS = ["client_ID", "period_Start", "total_Amount", "flow_Count"]
+
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query_string = scope.get("query_string", b"")
+        self.args = MultiDict(parse_qsl(self.query_string.decode("latin-1"), keep_blank_values=True))
+        self.headers = Headers([
+            (name.decode("latin-1"), value.decode("latin-1")) for name, value in scope.get("headers", [])
+        ])
+
+    @property
+    def accept_mimetypes(self):
+        return parse_accept_header(self.headers.get("Accept"), MIMEAccept)
+
+    @property
+    def accept_encodings(self):
+        return parse_accept_header(self.headers.get("Accept-Encoding"))
+
+    @property
+    def if_none_match(self):
+        return parse_etags(self.headers.get("If-None-Match"))
+
+
+class Response:
+    """A response body given as text, or as an async iterator of text chunks."""
+
+    def __init__(self, body="", status=200, mimetype="application/json", chunks=None):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.chunks = chunks
+        self.headers = Headers()
+        if mimetype:
+            self.headers["Content-Type"] = f"{mimetype}; charset=utf-8" if mimetype.startswith("text/") else mimetype
+
+    def set_etag(self, etag, weak=False):
+        self.headers["ETag"] = ("W/" if weak else "") + f'"{etag}"'
+
+
+def error_response(message, status):
+    body = json.dumps({"error": message}, separators=(",", ":"), sort_keys=True) + "\n"
+    return Response(body, status)
+
+
+class AsyncAPI:
+    def __init__(self, db, config):
+        self.db = db
+        self.config = config
+        self.serializer = make_serializer(config["JSON_SERIALIZER"])
+        self.routes = []
+        for resource in (EMPLOYEES, CLIENTS, PRODUCTS, TRANSACTIONS, CASH_FLOWS):
+            self.route(f"/{resource.table}", self._lister(resource))
+        self.route(r"/clients/(?P<client_id>\d+)/positions", self.client_positions)
+        self.route("/cash_flows/summary", self.cash_flow_summary)
+        self._opened = False
+        self._open_lock = asyncio.Lock()
+
+    def route(self, pattern, handler):
+        self.routes.append((re.compile(pattern), handler))
+
+    def _lister(self, resource):
+        async def handler(request):
+            return await self.list_resource(request, resource)
+        return handler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self):
+        if self._opened:
+            return
+        # Concurrent first requests (without a lifespan startup) must not
+        # each open a pool.
+        async with self._open_lock:
+            if not self._opened:
+                await self.db.open()
+                self._opened = True
+
+    async def shutdown(self):
+        async with self._open_lock:
+            if self._opened:
+                await self.db.close()
+                self._opened = False
+
+    async def _http(self, scope, send):
+        request = Request(scope)
+        await self.startup()
+        response = await self.dispatch(request)
+        await self._send(request, response, send)
+
+    async def dispatch(self, request):
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if request.method not in ("GET", "HEAD"):
+                response = error_response("Method not allowed; writes are served by the WSGI app", 405)
+                response.headers["Allow"] = "GET, HEAD"
+                return response
+            params = {name: int(value) for name, value in match.groupdict().items()}
+            return await handler(request, **params)
+        return error_response("Not found", 404)
+
+    def _should_compress(self, request, response):
+        return (
+            response.mimetype in self.config["COMPRESS_MIMETYPES"]
+            and response.status not in (204, 304)
+            and request.method != "HEAD"
+            and accepts_gzip(request.accept_encodings)
+        )
+
+    async def _send(self, request, response, send):
+        headers = response.headers
+        if response.mimetype in self.config["COMPRESS_MIMETYPES"]:
+            headers.add("Vary", "Accept-Encoding")
+        level = self.config["COMPRESS_LEVEL"]
+        compress = self._should_compress(request, response)
+
+        if response.chunks is None:
+            body = response.body.encode("utf-8")
+            if compress and len(body) >= self.config["COMPRESS_MIN_SIZE"]:
+                body = gzip_bytes(body, level)
+                self._mark_gzip(headers)
+            headers["Content-Length"] = str(len(body))
+            await send({"type": "http.response.start", "status": response.status, "headers": self._raw(headers)})
+            await send({"type": "http.response.body", "body": b"" if request.method == "HEAD" else body})
+            return
+
+        gzip = None
+        if compress:
+            gzip = GzipStream(level)
+            self._mark_gzip(headers)
+        await send({"type": "http.response.start", "status": response.status, "headers": self._raw(headers)})
+        try:
+            if request.method == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+                return
+            async for chunk in response.chunks:
+                data = gzip.compress(chunk) if gzip is not None else chunk.encode("utf-8")
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+            tail = gzip.finish() if gzip is not None else b""
+            await send({"type": "http.response.body", "body": tail})
+        finally:
+            await response.chunks.aclose()
+
+    @staticmethod
+    def _mark_gzip(headers):
+        headers["Content-Encoding"] = "gzip"
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    @staticmethod
+    def _raw(headers):
+        return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    def _wants_stream(self, request):
+        if request.args.get("stream") == "1":
+            return True
+        best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+        return best == "application/x-ndjson"
+
+    async def list_resource(self, request, resource):
+        table = resource.table
+        limit, after_id, error = repository.parse_page_args(
+            request.args, self.config["DEFAULT_PAGE_LIMIT"], self.config["MAX_PAGE_LIMIT"]
+        )
+        if error:
+            return error_response(error, 400)
+
+        keys, fields_error = resource.parse_fields(request.args.get("fields"))
+        if fields_error:
+            return error_response(fields_error, 400)
+        selected = resource.projection(keys)
+
+        includes, include_error = resource.parse_includes(request.args.get("include"))
+        if include_error:
+            return error_response(include_error, 400)
+
+        conditions, filter_error = resource.parse_filters(request.args, qualified=bool(includes))
+        if filter_error:
+            return error_response(filter_error, 400)
+        nested = resource.nested_layout(selected, includes)
+
+        if self._wants_stream(request):
+            if "limit" not in request.args:
+                limit = None
+            return await self.stream_resource(resource, selected, keys, conditions, limit, after_id, includes, nested)
+
+        tables = [table] + [relation.target.table for relation in includes]
+        version = repository.combine_versions(tables, await self.db.fetchall(*repository.versions_query(tables)))
+        etag = repository.page_etag(table, version, request.query_string)
+        if etag and request.if_none_match.contains_weak(etag):
+            response = Response(status=304, mimetype=None)
+            response.set_etag(etag)
+            return response
+
+        # One row past the page tells us whether a next page exists.
+        rows = await self.db.fetchall(
+            *repository.page_query(resource, selected, conditions, after_id, limit + 1, includes)
+        )
+        rows, next_args, empty_error = repository.trim_page(resource, rows, limit, after_id, request.args.to_dict())
+        if empty_error:
+            return error_response(empty_error, 404)
+
+        response = Response(self.serializer.rows(selected, keys, rows, nested))
+        if next_args:
+            response.headers["Link"] = f'<{request.path}?{urlencode(next_args)}>; rel="next"'
+        if etag:
+            response.set_etag(etag)
+        return response
+
+    async def stream_resource(self, resource, selected, keys, conditions, limit, after_id, includes, nested):
+        sql, params = repository.page_query(resource, selected, conditions, after_id, limit, includes)
+        batches = self.db.stream(sql, params, self.config["STREAM_CHUNK_SIZE"])
+        first = await anext(batches, None)
+        empty_error = repository.empty_page_error(resource, first, after_id)
+        if empty_error:
+            await batches.aclose()
+            return error_response(empty_error, 404)
+
+        serializer = self.serializer
+
+        async def chunks():
+            try:
+                if first:
+                    yield "".join([serializer.row(selected, keys, row, nested) + "\n" for row in first])
+                async for rows in batches:
+                    yield "".join([serializer.row(selected, keys, row, nested) + "\n" for row in rows])
+            finally:
+                await batches.aclose()
+
+        return Response(mimetype="application/x-ndjson", chunks=chunks())
+
+    async def client_positions(self, request, client_id):
+        rows = await self.db.fetchall(positions.SELECT_SQL, (client_id,))
+        if not rows:
+            return error_response("No positions found", 404)
+        return Response(self.serializer.rows(POSITION_KEYS, POSITION_KEYS, rows))
+
+    async def cash_flow_summary(self, request):
+        granularity = request.args.get("granularity", "day")
+        if granularity not in cash_flows.GRANULARITIES:
+            return error_response("granularity must be 'day' or 'month'", 400)
+        conditions, filter_error = repository.parse_filters(cash_flows.SUMMARY_FILTERS, request.args)
+        if filter_error:
+            return error_response(filter_error, 400)
+
+        rows = await self.db.fetchall(*cash_flows.summary_query(granularity, conditions))
+        if not rows:
+            return error_response("No cash flows found", 404)
+        return Response(self.serializer.rows(SUMMARY_KEYS, SUMMARY_KEYS, rows))
+
+
+def create_async_app(config=None, db=None):
+    settings = dict(DEFAULT_CONFIG)
+    settings.update(config or {})
+    if db is None:
+        db = AiomysqlDatabase(
+            settings["MYSQL_HOST"],
+            settings["MYSQL_USER"],
+            settings["MYSQL_PASSWORD"],
+            settings["MYSQL_DB"],
+            min_size=settings["MYSQL_POOL_MIN_SIZE"],
+            max_size=settings["MYSQL_POOL_MAX_SIZE"],
+        )
+    return AsyncAPI(db, settings)
+
+
+app = create_async_app()
@@ -0,0 +1,137 @@
+"""Async database drivers for ``async_app``.
+
+A driver runs parameterized statements (``%s`` placeholders, as everywhere
+else in this repo) and returns rows as tuples:
+
+- ``await db.open()`` / ``await db.close()``
+- ``await db.fetchall(sql, params)``
+- ``db.stream(sql, params, chunk_size)``: an async iterator of row lists
+
+:class:`AiomysqlDatabase` is the production driver. :class:`ThreadedDatabase`
+runs any blocking DB-API connection factory on a thread pool, and
+:class:`FakeDatabase` answers from a Python callable for tests.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AiomysqlDatabase:
+    """Driver over an ``aiomysql`` pool (requires the ``aiomysql`` package)."""
+
+    def __init__(self, host, user, password, db, min_size=1, max_size=10, **options):
+        self.options = dict(host=host, user=user, password=password, db=db, **options)
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    async def open(self):
+        import aiomysql
+
+        self._aiomysql = aiomysql
+        # Reads only: autocommit keeps each statement on a fresh snapshot.
+        self._pool = await aiomysql.create_pool(
+            minsize=self.min_size, maxsize=self.max_size, autocommit=True, **self.options
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def fetchall(self, sql, params=()):
+        async with self._pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    async def stream(self, sql, params, chunk_size):
+        async with self._pool.acquire() as conn:
+            async with conn.cursor(self._aiomysql.SSCursor) as cursor:
+                await cursor.execute(sql, params)
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield list(rows)
+
+
+class ThreadedDatabase:
+    """Driver over a blocking ``connect()`` factory, one connection per thread.
+
+    Useful with ``MySQLdb.connect`` where ``aiomysql`` is unavailable, or
+    with the SQLite stand-in in ``benchmarks/sqlite_db.py``. The event loop
+    never blocks, but concurrent queries are bounded by ``max_workers``.
+    """
+
+    def __init__(self, connect, max_workers=10):
+        self.connect = connect
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._executor = None
+
+    async def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="async-db")
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+        return conn
+
+    def _fetchall(self, sql, params):
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return list(cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.rollback()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def fetchall(self, sql, params=()):
+        return await self._run(self._fetchall, sql, params)
+
+    async def stream(self, sql, params, chunk_size):
+        # Buffered per statement: a server-side cursor cannot be shared
+        # between the executor's threads.
+        rows = await self.fetchall(sql, params)
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+
+class FakeDatabase:
+    """In-process stand-in: ``handler(sql, params)`` returns the rows.
+
+    Every statement is recorded in ``queries``.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.queries = []
+        self.opened = False
+
+    async def open(self):
+        self.opened = True
+
+    async def close(self):
+        self.opened = False
+
+    async def fetchall(self, sql, params=()):
+        self.queries.append((sql, tuple(params)))
+        await asyncio.sleep(0)
+        return list(self.handler(sql, tuple(params)))
+
+    async def stream(self, sql, params, chunk_size):
+        rows = await self.fetchall(sql, params)
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
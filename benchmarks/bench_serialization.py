@@ -0,0 +1,80 @@
+"""Compare the list-response serializers on synthetic transaction rows.
+
+Usage: python benchmarks/bench_serialization.py [--rows N] [--repeat N]
+
+Prints one JSON object with the best time per backend and its speed-up over
+``jsonify``. Needs no database.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from repository import TRANSACTIONS
+from serializers import make_serializer, orjson
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime.date(2020, 1, 1)
+    return [
+        (
+            n,
+            rng.randint(1, 5000),
+            rng.randint(1, 50),
+            Decimal(rng.randint(-10**8, 10**8)) / 100,
+            start + datetime.timedelta(days=rng.randint(0, 1800)),
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    keys = TRANSACTIONS.keys
+    backends = ["jsonify", "template"] + (["orjson"] if orjson is not None else [])
+
+    app = Flask(__name__)
+    results = {}
+    with app.app_context():
+        expected = make_serializer("jsonify").rows(keys, keys, rows)
+        for backend in backends:
+            serializer = make_serializer(backend)
+            if serializer.rows(keys, keys, rows) != expected:
+                raise SystemExit(f"{backend} output differs from jsonify")
+            seconds = best_time(lambda: serializer.rows(keys, keys, rows), args.repeat)
+            results[backend] = {
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(args.rows / seconds),
+            }
+
+    baseline = results["jsonify"]["seconds"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["seconds"], 2)
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare two reports written by ``benchmarks/run.py``.
+
+Usage: python benchmarks/compare.py BASELINE.json CANDIDATE.json
+
+Prints, per scenario present in both, the candidate's p50/p95/p99 and
+throughput with the relative change from the baseline, as JSON.
+"""
+import sys
+import json
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_kb"]
+
+
+def change(before, after):
+    if not before or after is None:
+        return None
+    return round((after - before) / before * 100, 1)
+
+
+def compare(baseline, candidate):
+    report = {}
+    for name, after in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        report[name] = {
+            metric: {"value": after.get(metric), "change_pct": change(before.get(metric), after.get(metric))}
+            for metric in METRICS
+        }
+    return report
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        raise SystemExit(__doc__.strip().splitlines()[2])
+    with open(argv[0]) as f:
+        baseline = json.load(f)
+    with open(argv[1]) as f:
+        candidate = json.load(f)
+    if baseline["meta"]["volumes"] != candidate["meta"]["volumes"]:
+        print("warning: the runs were seeded with different volumes", file=sys.stderr)
+    print(json.dumps(compare(baseline, candidate), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Latency and throughput benchmarks for every route in app.py.
+
+Usage:
+    python benchmarks/run.py [--transactions N] [--clients N] [--requests N]
+                             [--concurrency N] [--scenarios a,b] [--output FILE]
+
+The app runs unchanged against a SQLite stand-in (see ``sqlite_db.py``)
+seeded deterministically at the requested volumes. Each scenario sends
+``--requests`` requests from ``--concurrency`` threads, each with its own
+WSGI test client, and reports p50/p95/p99 latency, throughput, status
+codes and peak memory as JSON. Compare two runs with
+``benchmarks/compare.py``.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import datetime
+import itertools
+import resource
+import tempfile
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from flask_bcrypt import generate_password_hash
+
+import sqlite_db
+
+PASSWORD = "bench-password"
+
+
+class Scenario:
+    """A named request pattern; ``build(n)`` returns ``(method, path, options)``."""
+
+    def __init__(self, name, build, admin=False):
+        self.name = name
+        self.build = build
+        self.admin = admin
+
+
+def make_scenarios(volumes, encode_cursor):
+    rng = random.Random(1)
+    clients, transactions = volumes["clients"], volumes["transactions"]
+    top = {table: itertools.count(volumes[table], -1) for table in ("employees", "clients", "products", "transactions")}
+    fresh = itertools.count(max(volumes.values()) + 1)
+
+    def new_transaction(transaction_id):
+        return {
+            "transaction_ID": transaction_id,
+            "client_ID": rng.randint(1, clients),
+            "product_ID": rng.randint(1, volumes["products"]),
+            "transaction_Amount": rng.randint(1, 10**6),
+            "transaction_Date": "2024-12-11",
+        }
+
+    def get(path):
+        return lambda n: ("GET", path() if callable(path) else path, {})
+
+    def send(method, path, body):
+        return lambda n: (method, path(), {"json": body()})
+
+    return [
+        Scenario("list_employees", get("/employees")),
+        Scenario("list_clients", get("/clients")),
+        Scenario("list_products", get("/products")),
+        Scenario("list_transactions", get("/transactions")),
+        Scenario("list_transactions_after", get(
+            lambda: f"/transactions?after={encode_cursor(rng.randint(1, transactions))}"
+        )),
+        Scenario("list_transactions_fields", get("/transactions?fields=client_ID,transaction_Amount")),
+        Scenario("list_transactions_include", get("/transactions?include=client,product")),
+        Scenario("list_clients_include", get("/clients?include=manager")),
+        Scenario("list_transactions_gzip", lambda n: (
+            "GET", "/transactions", {"headers": {"Accept-Encoding": "gzip"}}
+        )),
+        Scenario("filter_transactions", get(
+            lambda: f"/transactions?client_ID={rng.randint(1, clients)}&min_amount=10"
+        )),
+        Scenario("stream_transactions", get("/transactions?stream=1&limit=1000")),
+        Scenario("client_positions", get(lambda: f"/clients/{rng.randint(1, clients)}/positions")),
+        Scenario("list_cash_flows", get("/cash_flows")),
+        Scenario("cash_flow_summary", get(
+            lambda: f"/cash_flows/summary?granularity=month&client_ID={rng.randint(1, clients)}"
+        )),
+        Scenario("status", get("/status")),
+        Scenario("login", send("POST", lambda: "/login", lambda: {"username": "bench", "password": PASSWORD})),
+        Scenario("create_employee", send(
+            "POST", lambda: "/employees", lambda: {"employee_ID": next(fresh), "name": "Bench Employee"}
+        ), admin=True),
+        Scenario("create_client", send("POST", lambda: "/clients", lambda: {
+            "client_ID": next(fresh), "name": "Bench Client", "email": "bench@example.com",
+            "phone": "5550000000", "client_Manager_Employee_ID": 1,
+        }), admin=True),
+        Scenario("create_product", send(
+            "POST", lambda: "/products", lambda: {"product_ID": next(fresh), "product_Type": "Bench"}
+        ), admin=True),
+        Scenario("create_transaction", send(
+            "POST", lambda: "/transactions", lambda: new_transaction(next(fresh))
+        ), admin=True),
+        Scenario("create_transaction_async", send(
+            "POST", lambda: "/transactions?async=1", lambda: new_transaction(next(fresh))
+        ), admin=True),
+        Scenario("bulk_transactions", send(
+            "POST", lambda: "/transactions/bulk", lambda: [new_transaction(next(fresh)) for _ in range(100)]
+        ), admin=True),
+        Scenario("create_cash_flow", send("POST", lambda: "/cash_flows", lambda: {
+            "cash_Flow_ID": next(fresh), "client_ID": rng.randint(1, clients),
+            "cash_Flow_Amount": "125.00", "cash_Flow_Date": "2024-12-11",
+        }), admin=True),
+        Scenario("update_employee", send(
+            "PUT", lambda: f"/employees/{rng.randint(1, volumes['employees'])}", lambda: {"name": "Renamed"}
+        ), admin=True),
+        Scenario("update_client", send("PUT", lambda: f"/clients/{rng.randint(1, clients)}", lambda: {
+            "name": "Renamed", "email": "renamed@example.com", "phone": "5551111111",
+            "client_Manager_Employee_ID": 1,
+        }), admin=True),
+        Scenario("update_product", send(
+            "PUT", lambda: f"/products/{rng.randint(1, volumes['products'])}", lambda: {"product_Type": "Renamed"}
+        ), admin=True),
+        Scenario("update_transaction", send(
+            "PUT", lambda: f"/transactions/{rng.randint(1, transactions)}",
+            lambda: {key: value for key, value in new_transaction(0).items() if key != "transaction_ID"}
+        ), admin=True),
+        Scenario("delete_transaction", lambda n: (
+            "DELETE", f"/transactions/{next(top['transactions'])}", {}
+        ), admin=True),
+        Scenario("delete_client", lambda n: ("DELETE", f"/clients/{next(top['clients'])}", {}), admin=True),
+        Scenario("delete_product", lambda n: ("DELETE", f"/products/{next(top['products'])}", {}), admin=True),
+        Scenario("delete_employee", lambda n: ("DELETE", f"/employees/{next(top['employees'])}", {}), admin=True),
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(app, scenario, requests, concurrency, headers, trace_memory):
+    counter = itertools.count()
+    build_lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    results_lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        own_latencies = []
+        own_statuses = {}
+        while True:
+            with build_lock:
+                n = next(counter)
+                if n >= requests:
+                    break
+                method, path, options = scenario.build(n)
+            if scenario.admin:
+                options.setdefault("headers", {}).update(headers)
+            start = time.perf_counter()
+            response = client.open(path, method=method, **options)
+            response.get_data()
+            own_latencies.append(time.perf_counter() - start)
+            own_statuses[response.status_code] = own_statuses.get(response.status_code, 0) + 1
+            response.close()
+        with results_lock:
+            latencies.extend(own_latencies)
+            for status, count in own_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        # ru_maxrss is kilobytes on Linux and a high-water mark for the
+        # whole run, so it only ever grows from one scenario to the next.
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    if trace_memory:
+        result["peak_traced_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every route in app.py against a seeded SQLite database.")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=50000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--cash-flows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="work factor of the seeded login hash")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replicas", type=int, default=0,
+                        help="route reads through this many replica pools (all backed by the same file)")
+    parser.add_argument("--db", help="SQLite file to use (default: a temporary file, seeded each run)")
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peaks (slower)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    volumes = {
+        "employees": args.employees,
+        "clients": args.clients,
+        "products": args.products,
+        "transactions": args.transactions,
+        "cash_flows": args.cash_flows,
+    }
+
+    workdir = tempfile.TemporaryDirectory(prefix="bench-")
+    db_path = args.db or os.path.join(workdir.name, "bench.sqlite3")
+    seed_start = time.perf_counter()
+    if not os.path.exists(db_path):
+        password_hash = generate_password_hash(PASSWORD, args.bcrypt_rounds).decode("utf-8")
+        sqlite_db.seed(db_path, volumes, password_hash, args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+
+    import app as app_module
+
+    connect = sqlite_db.connection_factory(db_path)
+    app = app_module.create_app({
+        "MYSQL_CONNECTION_FACTORY": connect,
+        "MYSQL_REPLICAS": [connect] * args.replicas,
+        "USER_STORE": "mysql",
+    })
+    headers = {"x-access-token": jwt.encode(
+        {
+            "user_id": "bench",
+            "role": "admin",
+            "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=6),
+        },
+        app.config["SECRET_KEY"],
+        algorithm="HS256",
+    )}
+
+    scenarios = make_scenarios(volumes, app_module.encode_cursor)
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        unknown = wanted - {scenario.name for scenario in scenarios}
+        if unknown:
+            raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+    if args.trace_memory:
+        tracemalloc.start()
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = run_scenario(
+            app, scenario, args.requests, args.concurrency, headers, args.trace_memory
+        )
+    app.extensions["transaction_committer"].stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "volumes": volumes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "replicas": args.replicas,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    workdir.cleanup()
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""SQLite stand-in for the MySQL database, for benchmarks.
+
+:func:`connection_factory` returns a callable suitable for
+``MYSQL_CONNECTION_FACTORY``: each call opens a connection that speaks
+enough of the ``MySQLdb`` interface (``%s`` placeholders, ``rowcount``,
+``fetchmany``, ``ping``, ``MySQLdb`` exceptions) for the app to run
+unchanged. The few MySQL-only statements the app issues are rewritten to
+their SQLite equivalents.
+"""
+import re
+import random
+import sqlite3
+import datetime
+from decimal import Decimal
+
+import MySQLdb
+
+import positions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    Employee_ID INTEGER PRIMARY KEY,
+    Name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clients (
+    Client_ID INTEGER PRIMARY KEY,
+    Name TEXT NOT NULL,
+    Email TEXT NOT NULL,
+    Phone TEXT NOT NULL,
+    Client_Manager_Employee_ID INT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    Product_ID INTEGER PRIMARY KEY,
+    Product_Type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    Transaction_ID INTEGER PRIMARY KEY,
+    Client_ID INT NOT NULL,
+    Product_ID INT NOT NULL,
+    Transaction_Amount DECIMAL(20, 2) NOT NULL,
+    Transaction_Date DATE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_client_id ON transactions (Client_ID, Transaction_ID);
+CREATE INDEX IF NOT EXISTS idx_transactions_product_id ON transactions (Product_ID, Transaction_ID);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (Transaction_Date, Transaction_ID);
+CREATE TABLE IF NOT EXISTS users (
+    Username TEXT PRIMARY KEY,
+    Password TEXT NOT NULL,
+    Role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS table_versions (
+    Table_Name TEXT PRIMARY KEY,
+    Version INT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS client_positions (
+    Client_ID INT NOT NULL,
+    Product_ID INT NOT NULL,
+    Position_Amount DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    Transaction_Count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Client_ID, Product_ID)
+);
+CREATE TABLE IF NOT EXISTS cash_flows (
+    Cash_Flow_ID INTEGER PRIMARY KEY,
+    Client_ID INT NOT NULL,
+    Cash_Flow_Amount DECIMAL(20, 2) NOT NULL,
+    Cash_Flow_Date DATE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cash_flows_client_date ON cash_flows (Client_ID, Cash_Flow_Date);
+CREATE TABLE IF NOT EXISTS cash_flow_rollups (
+    Granularity TEXT NOT NULL,
+    Client_ID INT NOT NULL,
+    Bucket_Start DATE NOT NULL,
+    Total_Amount DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    Flow_Count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Granularity, Client_ID, Bucket_Start)
+);
+"""
+
+# Conflict targets for the app's INSERT ... ON DUPLICATE KEY UPDATE upserts.
+CONFLICT_KEYS = {
+    "client_positions": "Client_ID, Product_ID",
+    "cash_flow_rollups": "Granularity, Client_ID, Bucket_Start",
+}
+
+# Statements with no mechanical translation.
+REWRITES = {
+    positions.REVERSE_SQL: (
+        "UPDATE client_positions "
+        "SET Position_Amount = Position_Amount - t.Transaction_Amount, "
+        "Transaction_Count = Transaction_Count - 1 "
+        "FROM transactions t "
+        "WHERE client_positions.Client_ID = t.Client_ID "
+        "AND client_positions.Product_ID = t.Product_ID "
+        "AND t.Transaction_ID = %s"
+    ),
+}
+
+_UPSERT = re.compile(r"^INSERT INTO (\w+)(.*) ON DUPLICATE KEY UPDATE (.*)$", re.S)
+_VALUES_REF = re.compile(r"VALUES\((\w+)\)")
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_converter("DATE", lambda raw: datetime.date.fromisoformat(raw.decode("ascii")))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode("ascii")).quantize(Decimal("0.01")))
+
+
+def translate(sql):
+    sql = REWRITES.get(sql, sql)
+    match = _UPSERT.match(sql)
+    if match:
+        table, rest, assignments = match.groups()
+        assignments = _VALUES_REF.sub(r"excluded.\1", assignments)
+        sql = f"INSERT INTO {table}{rest} ON CONFLICT ({CONFLICT_KEYS[table]}) DO UPDATE SET {assignments}"
+    return sql.replace("%s", "?")
+
+
+def _mysql_error(exc):
+    if isinstance(exc, sqlite3.IntegrityError):
+        return MySQLdb.IntegrityError(1062, str(exc))
+    if isinstance(exc, sqlite3.OperationalError):
+        return MySQLdb.OperationalError(2013, str(exc))
+    return MySQLdb.DatabaseError(str(exc))
+
+
+class Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        try:
+            self._cursor.execute(translate(sql), tuple(params or ()))
+        except sqlite3.Error as exc:
+            raise _mysql_error(exc) from exc
+        return self._cursor.rowcount
+
+    def executemany(self, sql, rows):
+        try:
+            self._cursor.executemany(translate(sql), [tuple(row) for row in rows])
+        except sqlite3.Error as exc:
+            raise _mysql_error(exc) from exc
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, path):
+        # Pooled connections are handed between request threads, one at a time.
+        self._conn = sqlite3.connect(
+            path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+
+    def cursor(self, cursorclass=None):
+        # SQLite cursors already step through results lazily, so an
+        # SSCursor request needs nothing special.
+        return Cursor(self._conn.cursor())
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as exc:
+            raise _mysql_error(exc) from exc
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def connection_factory(path):
+    return lambda: Connection(path)
+
+
+def seed(path, volumes, password_hash, seed=0):
+    """Create the schema in ``path`` and fill it deterministically.
+
+    ``volumes`` maps ``employees``, ``clients``, ``products``,
+    ``transactions`` and ``cash_flows`` to row counts. One admin user,
+    ``bench``, is added with ``password_hash``.
+    """
+    rng = random.Random(seed)
+    start = datetime.date(2020, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute("PRAGMA journal_mode = WAL")
+
+    employees, clients, products = volumes["employees"], volumes["clients"], volumes["products"]
+    conn.executemany(
+        "INSERT INTO employees VALUES (?, ?)",
+        ((n, f"Employee {n}") for n in range(1, employees + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO clients VALUES (?, ?, ?, ?, ?)",
+        (
+            (n, f"Client {n}", f"client{n}@example.com", f"555{n:07d}", rng.randint(1, employees))
+            for n in range(1, clients + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO products VALUES (?, ?)",
+        ((n, f"Product {n}") for n in range(1, products + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO transactions VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                n,
+                rng.randint(1, clients),
+                rng.randint(1, products),
+                str(Decimal(rng.randint(1, 10**7)) / 100),
+                (start + datetime.timedelta(days=rng.randint(0, 1800))).isoformat(),
+            )
+            for n in range(1, volumes["transactions"] + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO cash_flows VALUES (?, ?, ?, ?)",
+        (
+            (
+                n,
+                rng.randint(1, clients),
+                str(Decimal(rng.randint(-10**6, 10**6) or 1) / 100),
+                (start + datetime.timedelta(days=rng.randint(0, 1800))).isoformat(),
+            )
+            for n in range(1, volumes["cash_flows"] + 1)
+        ),
+    )
+    conn.execute(
+        "INSERT INTO client_positions "
+        "SELECT Client_ID, Product_ID, SUM(Transaction_Amount), COUNT(*) FROM transactions "
+        "GROUP BY Client_ID, Product_ID"
+    )
+    conn.execute(
+        "INSERT INTO cash_flow_rollups "
+        "SELECT 'day', Client_ID, Cash_Flow_Date, SUM(Cash_Flow_Amount), COUNT(*) FROM cash_flows "
+        "GROUP BY Client_ID, Cash_Flow_Date"
+    )
+    conn.execute(
+        "INSERT INTO cash_flow_rollups "
+        "SELECT 'month', Client_ID, strftime('%Y-%m-01', Cash_Flow_Date), SUM(Cash_Flow_Amount), COUNT(*) "
+        "FROM cash_flows GROUP BY Client_ID, strftime('%Y-%m-01', Cash_Flow_Date)"
+    )
+    conn.executemany(
+        "INSERT INTO table_versions VALUES (?, 0)",
+        [(table,) for table in ("employees", "clients", "products", "transactions", "cash_flows")],
+    )
+    conn.execute("INSERT INTO users VALUES ('bench', ?, 'admin')", (password_hash,))
+    conn.commit()
+    conn.close()
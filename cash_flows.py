@@ -0,0 +1,96 @@
+"""Append-only cash-flow ledger with per-client daily and monthly rollups.
+
+Flows are never updated or deleted; corrections are posted as new,
+offsetting flows. That lets every insert fold straight into
+``cash_flow_rollups`` so summaries never scan the raw ledger.
+"""
+from collections import defaultdict
+
+import repository
+from repository import CASH_FLOWS
+
+GRANULARITIES = {
+    "day": lambda date: date,
+    "month": lambda date: date.replace(day=1),
+}
+
+SUMMARY_FILTERS = {
+    "client_ID": ("Client_ID", "=", int),
+    "from": ("Bucket_Start", ">=", repository.parse_date),
+    "to": ("Bucket_Start", "<=", repository.parse_date),
+}
+
+ROLLUP_SQL = (
+    "INSERT INTO cash_flow_rollups (Granularity, Client_ID, Bucket_Start, Total_Amount, Flow_Count) "
+    "VALUES (%s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE Total_Amount = Total_Amount + VALUES(Total_Amount), "
+    "Flow_Count = Flow_Count + VALUES(Flow_Count)"
+)
+
+
+def parse_id(value):
+    """``value`` as an int if it is a JSON integer or a string of digits, else None."""
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def prepare(data):
+    """Validate one flow; return ``(values, None)`` or ``(None, error)``."""
+    values, error = repository.validate(CASH_FLOWS, data)
+    if error:
+        return None, error
+    cash_flow_id, client_id, amount, flow_date = values
+    # Rollup keys are sorted, so a batch must not mix ints and strings, and
+    # the ledger is append-only, so 1.9 or true must not quietly become 1.
+    cash_flow_id = parse_id(cash_flow_id)
+    client_id = parse_id(client_id)
+    if cash_flow_id is None or client_id is None:
+        return None, "Invalid cash flow or client ID"
+    try:
+        amount = repository.parse_decimal(str(amount))
+        flow_date = repository.parse_date(str(flow_date))
+    except ValueError:
+        return None, "Invalid amount or date"
+    return (cash_flow_id, client_id, amount, flow_date), None
+
+
+def record(cursor, rows, batch_size):
+    """Insert prepared rows and fold them into the rollups.
+
+    Rollup rows are written in key order so concurrent batches lock them in
+    the same order.
+    """
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(CASH_FLOWS.insert_sql, rows[start:start + batch_size])
+
+    totals = defaultdict(lambda: [0, 0])
+    for _, client_id, amount, flow_date in rows:
+        for granularity, bucket in GRANULARITIES.items():
+            total = totals[(granularity, client_id, bucket(flow_date))]
+            total[0] += amount
+            total[1] += 1
+    cursor.executemany(
+        ROLLUP_SQL,
+        [key + tuple(total) for key, total in sorted(totals.items())]
+    )
+
+
+def summary_query(granularity, conditions):
+    sql = (
+        "SELECT Client_ID, Bucket_Start, Total_Amount, Flow_Count FROM cash_flow_rollups "
+        "WHERE Granularity = %s"
+    )
+    params = [granularity]
+    for condition, value in conditions:
+        sql += f" AND {condition}"
+        params.append(value)
+    sql += " ORDER BY Client_ID, Bucket_Start"
+    return sql, tuple(params)
+
+
+def summary(cursor, granularity, conditions):
+    cursor.execute(*summary_query(granularity, conditions))
+    return cursor.fetchall()
@@ -0,0 +1,73 @@
+import zlib
+
+# wbits = 16 + MAX_WBITS makes zlib write a gzip header and trailer.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def gzip_bytes(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class GzipStream:
+    """Gzips a body chunk by chunk.
+
+    Every chunk is followed by a sync flush so a client decompressing on the
+    fly sees each batch of rows as soon as it is sent, not when the
+    compressor's window happens to fill. Shared by the WSGI and ASGI apps so
+    both send the same bytes.
+    """
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def compress(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def gzip_stream(chunks, level):
+    """Gzip an iterable of chunks as it is consumed (see :class:`GzipStream`)."""
+    stream = GzipStream(level)
+    try:
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def accepts_gzip(accept_encodings):
+    return accept_encodings["gzip"] > 0
+
+
+def compress_response(response, level, min_size):
+    """Gzip ``response`` in place; return whether it was compressed.
+
+    Buffered bodies shorter than ``min_size`` bytes are left alone. Streamed
+    bodies have no known length, so they are always compressed, chunk by
+    chunk, without being buffered.
+    """
+    if response.is_streamed:
+        response.response = gzip_stream(response.response, level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return False
+        response.set_data(gzip_bytes(data, level))
+    response.headers["Content-Encoding"] = "gzip"
+    # The gzipped body is not byte-identical to the plain one, so only a weak
+    # validator is still true of it.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return True
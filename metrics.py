@@ -0,0 +1,354 @@
+"""Request and query metrics in the Prometheus text format.
+
+Every thread records into its own shard, so the request path only touches
+thread-local dicts and never takes a lock; a lock is held only when a
+thread records for the first time and when ``/metrics`` merges the shards.
+Shards of threads that have exited are folded into a retired shard whenever
+a new shard is registered and at scrape time, so thread-per-connection
+servers do not accumulate them between scrapes.
+
+With :meth:`Metrics.share`, processes forked from one master also publish
+their totals to a shared directory, one file per process, and ``/metrics``
+merges every file there, so whichever worker answers a scrape reports the
+whole server.
+"""
+import os
+import re
+import json
+import time
+import bisect
+import threading
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HISTOGRAMS = ("request_latency", "query_latency", "queries_per_request")
+_PROCESS_FILE = re.compile(r"(\d+)\.json")
+
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        # One slot per bucket plus +Inf; counts are per bucket, not cumulative.
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+
+
+class Shard:
+    def __init__(self, thread):
+        self.thread = thread
+        self.requests = {}
+        self.request_latency = {}
+        self.in_flight = {}
+        self.query_latency = {}
+        self.queries_per_request = {}
+        # State of the request this thread is currently serving.
+        self.route = None
+        self.method = None
+        self.status = None
+        self.started = None
+        self.queries = 0
+
+
+def _observe(histograms, key, buckets, value):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = Histogram(len(buckets))
+    histogram.counts[bisect.bisect_left(buckets, value)] += 1
+    histogram.sum += value
+
+
+def _labels(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return ",".join(pairs)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _dump(shard):
+    return {
+        "requests": [list(key) + [count] for key, count in shard.requests.items()],
+        "in_flight": shard.in_flight,
+        "histograms": {
+            name: [[list(key), histogram.counts, histogram.sum] for key, histogram in getattr(shard, name).items()]
+            for name in HISTOGRAMS
+        },
+    }
+
+
+def _load(data):
+    shard = Shard(None)
+    for *key, count in data["requests"]:
+        shard.requests[tuple(key)] = count
+    shard.in_flight = dict(data["in_flight"])
+    for name in HISTOGRAMS:
+        histograms = getattr(shard, name)
+        for key, counts, total in data["histograms"][name]:
+            histogram = histograms[tuple(key)] = Histogram(len(counts) - 1)
+            histogram.counts = counts
+            histogram.sum = total
+    return shard
+
+
+def _write_json(path, data):
+    # Readers must never see a half-written file.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class Metrics:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = Shard(None)
+        self._lock = threading.Lock()
+        self.directory = None
+        self.interval = None
+        self._writer_pid = None
+
+    def share(self, directory, interval=1.0):
+        """Publish this process's totals to ``directory`` every ``interval``
+        seconds and report the sum over all processes writing there.
+
+        Counters and histograms of processes that have exited are kept;
+        their in-flight gauges are dropped. POSIX only.
+        """
+        self.directory = directory
+        self.interval = interval
+        # A forked child must not publish its parent's counts a second time.
+        os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = Shard(None)
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = Shard(threading.current_thread())
+            with self._lock:
+                self._prune()
+                self._shards.append(shard)
+                if self.directory is not None and self._writer_pid != os.getpid():
+                    # Threads do not survive a fork, so each process starts its own.
+                    self._writer_pid = os.getpid()
+                    threading.Thread(target=self._write_periodically, name="metrics-writer", daemon=True).start()
+        return shard
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's totals to the shared directory, if any."""
+        if self.directory is None:
+            return
+        _write_json(os.path.join(self.directory, f"{os.getpid()}.json"), _dump(self._collect()))
+
+    def start_request(self, route, method):
+        shard = self._shard()
+        shard.route = route
+        shard.method = method
+        shard.status = None
+        shard.queries = 0
+        shard.in_flight[route] = shard.in_flight.get(route, 0) + 1
+        shard.started = time.perf_counter()
+
+    def set_status(self, status):
+        self._shard().status = status
+
+    def end_request(self):
+        shard = self._shard()
+        if shard.started is None:
+            return
+        elapsed = time.perf_counter() - shard.started
+        route, method = shard.route, shard.method
+        status = shard.status or 500
+        key = (route, method, status)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        _observe(shard.request_latency, (route, method), REQUEST_BUCKETS, elapsed)
+        _observe(shard.queries_per_request, (route,), QUERY_COUNT_BUCKETS, shard.queries)
+        shard.in_flight[route] -= 1
+        shard.started = None
+        shard.route = None
+
+    def observe_query(self, operation, elapsed):
+        shard = self._shard()
+        if operation == "execute":
+            shard.queries += 1
+        _observe(shard.query_latency, (shard.route or "none", operation), QUERY_BUCKETS, elapsed)
+
+    def wrap_cursor(self, cursor):
+        return InstrumentedCursor(cursor, self)
+
+    def _prune(self):
+        # Called with the lock held.
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                self._merge_into(self._retired, shard)
+        self._shards = live
+
+    def _collect(self):
+        with self._lock:
+            self._prune()
+            merged = Shard(None)
+            for shard in [self._retired] + self._shards:
+                self._merge_into(merged, shard)
+        return merged
+
+    @staticmethod
+    def _merge_into(target, shard):
+        # list() snapshots each dict in one step, so the owning thread can
+        # keep writing while we read.
+        for key, count in list(shard.requests.items()):
+            target.requests[key] = target.requests.get(key, 0) + count
+        for key, count in list(shard.in_flight.items()):
+            target.in_flight[key] = target.in_flight.get(key, 0) + count
+        for name in HISTOGRAMS:
+            histograms = getattr(target, name)
+            for key, histogram in list(getattr(shard, name).items()):
+                if key not in histograms:
+                    histograms[key] = Histogram(len(histogram.counts) - 1)
+                histograms[key].merge(histogram)
+
+    def _collect_shared(self):
+        import fcntl
+
+        self.flush()
+        merged = Shard(None)
+        retired_path = os.path.join(self.directory, "retired.json")
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            # Held while exited processes are folded into retired.json, so
+            # two scrapes cannot both count them.
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(retired_path) as f:
+                    retired = _load(json.load(f))
+            except FileNotFoundError:
+                retired = Shard(None)
+            exited = []
+            for name in os.listdir(self.directory):
+                match = _PROCESS_FILE.fullmatch(name)
+                if match is None:
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path) as f:
+                        shard = _load(json.load(f))
+                except FileNotFoundError:
+                    continue
+                pid = int(match.group(1))
+                if pid == os.getpid() or _process_alive(pid):
+                    self._merge_into(merged, shard)
+                else:
+                    shard.in_flight = {}
+                    self._merge_into(retired, shard)
+                    exited.append(path)
+            if exited:
+                _write_json(retired_path, _dump(retired))
+                for path in exited:
+                    os.unlink(path)
+        self._merge_into(merged, retired)
+        return merged
+
+    def render(self):
+        merged = self._collect() if self.directory is None else self._collect_shared()
+        lines = []
+
+        lines.append("# HELP http_requests_total Requests handled, by route, method and status.")
+        lines.append("# TYPE http_requests_total counter")
+        for key, count in sorted(merged.requests.items(), key=str):
+            lines.append(f"http_requests_total{{{_labels(('route', 'method', 'status'), key)}}} {count}")
+
+        lines.append("# HELP http_requests_in_flight Requests currently being handled, by route.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for key, count in sorted(merged.in_flight.items()):
+            lines.append(f"http_requests_in_flight{{{_labels(('route',), (key,))}}} {count}")
+
+        self._render_histogram(
+            lines, "http_request_duration_seconds", "Request latency in seconds.",
+            ("route", "method"), REQUEST_BUCKETS, merged.request_latency,
+        )
+        self._render_histogram(
+            lines, "db_query_duration_seconds", "Time spent in cursor execute and fetch calls.",
+            ("route", "operation"), QUERY_BUCKETS, merged.query_latency,
+        )
+        self._render_histogram(
+            lines, "db_queries_per_request", "Statements executed per request.",
+            ("route",), QUERY_COUNT_BUCKETS, merged.queries_per_request,
+        )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(lines, name, help_text, label_names, buckets, histograms):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in sorted(histograms.items(), key=str):
+            labels = _labels(label_names, key)
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+class InstrumentedCursor:
+    """Times ``execute``/``executemany`` and the fetch calls of a cursor."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def _timed(self, operation, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._metrics.observe_query(operation, time.perf_counter() - start)
+
+    def execute(self, *args):
+        return self._timed("execute", self._cursor.execute, *args)
+
+    def executemany(self, *args):
+        return self._timed("execute", self._cursor.executemany, *args)
+
+    def fetchone(self):
+        return self._timed("fetch", self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed("fetch", self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed("fetch", self._cursor.fetchall)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
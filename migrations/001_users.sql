@@ -0,0 +1,7 @@
+-- Backing table for USER_STORE = "mysql".
+CREATE TABLE IF NOT EXISTS users (
+    Username VARCHAR(150) NOT NULL,
+    Password VARCHAR(255) NOT NULL,
+    Role ENUM('admin', 'user') NOT NULL,
+    PRIMARY KEY (Username)
+);
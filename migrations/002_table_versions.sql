@@ -0,0 +1,13 @@
+-- Per-table change counters behind the ETag on list endpoints. Every write
+-- handler bumps its table's row in the same transaction as the change.
+CREATE TABLE IF NOT EXISTS table_versions (
+    Table_Name VARCHAR(64) NOT NULL,
+    Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Table_Name)
+);
+
+INSERT IGNORE INTO table_versions (Table_Name, Version) VALUES
+    ('employees', 0),
+    ('clients', 0),
+    ('products', 0),
+    ('transactions', 0);
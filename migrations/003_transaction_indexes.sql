@@ -0,0 +1,53 @@
+-- Indexes behind the /transactions filters. Each equality filter is paired
+-- with Transaction_ID so the keyset ORDER BY is read straight off the index.
+-- A client's date range (client_ID with from/to) walks the client's index in
+-- Transaction_ID order and stops once a page is full, so it needs no index of
+-- its own; a second Client_ID index would only add work to every insert.
+--
+-- MySQL has no CREATE INDEX IF NOT EXISTS, so each statement checks
+-- information_schema first and the file can be re-run safely.
+
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'transactions'
+       AND index_name = 'idx_transactions_client_id') = 0,
+    'CREATE INDEX idx_transactions_client_id ON transactions (Client_ID, Transaction_ID)',
+    'DO 0'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'transactions'
+       AND index_name = 'idx_transactions_product_id') = 0,
+    'CREATE INDEX idx_transactions_product_id ON transactions (Product_ID, Transaction_ID)',
+    'DO 0'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'transactions'
+       AND index_name = 'idx_transactions_date') = 0,
+    'CREATE INDEX idx_transactions_date ON transactions (Transaction_Date, Transaction_ID)',
+    'DO 0'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Earlier versions of this file also created (Client_ID, Transaction_Date).
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'transactions'
+       AND index_name = 'idx_transactions_client_date') > 0,
+    'DROP INDEX idx_transactions_client_date ON transactions',
+    'DO 0'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,17 @@
+-- Running totals behind GET /clients/<client_id>/positions. Maintained by
+-- the transaction write handlers; rebuild with `flask --app app rebuild-positions`.
+CREATE TABLE IF NOT EXISTS client_positions (
+    Client_ID INT NOT NULL,
+    Product_ID INT NOT NULL,
+    Position_Amount DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    Transaction_Count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Client_ID, Product_ID)
+);
+
+INSERT INTO client_positions (Client_ID, Product_ID, Position_Amount, Transaction_Count)
+SELECT Client_ID, Product_ID, SUM(Transaction_Amount), COUNT(*)
+FROM transactions
+GROUP BY Client_ID, Product_ID
+ON DUPLICATE KEY UPDATE
+    Position_Amount = VALUES(Position_Amount),
+    Transaction_Count = VALUES(Transaction_Count);
@@ -0,0 +1,33 @@
+-- Append-only cash-flow ledger and the rollups that /cash_flows/summary
+-- reads. Positive amounts are inflows, negative amounts outflows.
+CREATE TABLE IF NOT EXISTS cash_flows (
+    Cash_Flow_ID INT NOT NULL,
+    Client_ID INT NOT NULL,
+    Cash_Flow_Amount DECIMAL(20, 2) NOT NULL,
+    Cash_Flow_Date DATE NOT NULL,
+    PRIMARY KEY (Cash_Flow_ID),
+    KEY idx_cash_flows_client_date (Client_ID, Cash_Flow_Date),
+    FOREIGN KEY (Client_ID) REFERENCES clients (Client_ID)
+);
+
+CREATE TABLE IF NOT EXISTS cash_flow_rollups (
+    Granularity ENUM('day', 'month') NOT NULL,
+    Client_ID INT NOT NULL,
+    Bucket_Start DATE NOT NULL,
+    Total_Amount DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    Flow_Count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Granularity, Client_ID, Bucket_Start)
+);
+
+INSERT IGNORE INTO table_versions (Table_Name, Version) VALUES ('cash_flows', 0);
+
+-- Seed the rollups from any flows recorded before this migration.
+INSERT INTO cash_flow_rollups (Granularity, Client_ID, Bucket_Start, Total_Amount, Flow_Count)
+SELECT 'day', Client_ID, Cash_Flow_Date, SUM(Cash_Flow_Amount), COUNT(*)
+FROM cash_flows GROUP BY Client_ID, Cash_Flow_Date
+ON DUPLICATE KEY UPDATE Total_Amount = VALUES(Total_Amount), Flow_Count = VALUES(Flow_Count);
+
+INSERT INTO cash_flow_rollups (Granularity, Client_ID, Bucket_Start, Total_Amount, Flow_Count)
+SELECT 'month', Client_ID, DATE_FORMAT(Cash_Flow_Date, '%Y-%m-01'), SUM(Cash_Flow_Amount), COUNT(*)
+FROM cash_flows GROUP BY Client_ID, DATE_FORMAT(Cash_Flow_Date, '%Y-%m-01')
+ON DUPLICATE KEY UPDATE Total_Amount = VALUES(Total_Amount), Flow_Count = VALUES(Flow_Count);
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingPoolFull(Exception):
+    """Raised when the bcrypt pool already has as much work as it may queue."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool.
+
+    bcrypt releases the GIL while it hashes, so a thread pool gives real
+    parallelism while keeping the CPU it can use bounded. At most
+    ``max_workers + max_pending`` calls are admitted at once; anything beyond
+    that raises :class:`HashingPoolFull` straight away instead of queueing.
+    """
+
+    def __init__(self, bcrypt, max_workers, max_pending):
+        self.bcrypt = bcrypt
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolFull()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def generate_password_hash(self, password):
+        return self._run(self.bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def check_password_hash(self, pw_hash, password):
+        return self._run(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def stats(self):
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": in_flight,
+                "busy": min(in_flight, self.max_workers),
+                "queued": max(in_flight - self.max_workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
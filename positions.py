@@ -0,0 +1,64 @@
+"""Per-client, per-product position totals kept in ``client_positions``.
+
+Every transaction write applies its delta in the same database transaction
+as the write itself, so the summary never needs a scan of ``transactions``
+except when it is rebuilt for reconciliation.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+ADD_SQL = (
+    "INSERT INTO client_positions (Client_ID, Product_ID, Position_Amount, Transaction_Count) "
+    "VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE Position_Amount = Position_Amount + VALUES(Position_Amount), "
+    "Transaction_Count = Transaction_Count + VALUES(Transaction_Count)"
+)
+
+# Takes the stored row's own values, so nothing has to be read into Python
+# before an update or delete.
+REVERSE_SQL = (
+    "UPDATE client_positions p JOIN transactions t "
+    "ON p.Client_ID = t.Client_ID AND p.Product_ID = t.Product_ID "
+    "SET p.Position_Amount = p.Position_Amount - t.Transaction_Amount, "
+    "p.Transaction_Count = p.Transaction_Count - 1 "
+    "WHERE t.Transaction_ID = %s"
+)
+
+SELECT_SQL = (
+    "SELECT Product_ID, Position_Amount, Transaction_Count FROM client_positions "
+    "WHERE Client_ID = %s AND Transaction_Count > 0 ORDER BY Product_ID"
+)
+
+
+def add_transactions(cursor, rows):
+    """Apply new transaction rows (in ``TRANSACTIONS`` column order)."""
+    totals = defaultdict(lambda: [Decimal(0), 0])
+    for _, client_id, product_id, amount, _ in rows:
+        total = totals[(client_id, product_id)]
+        total[0] += Decimal(str(amount))
+        total[1] += 1
+    if not totals:
+        return
+    cursor.executemany(
+        ADD_SQL,
+        [(client_id, product_id, amount, count) for (client_id, product_id), (amount, count) in totals.items()]
+    )
+
+
+def reverse_transaction(cursor, transaction_id):
+    """Take a stored transaction back out of its position before it changes."""
+    cursor.execute(REVERSE_SQL, (transaction_id,))
+
+
+def get_positions(cursor, client_id):
+    cursor.execute(SELECT_SQL, (client_id,))
+    return cursor.fetchall()
+
+
+def rebuild(cursor):
+    cursor.execute("DELETE FROM client_positions")
+    cursor.execute(
+        "INSERT INTO client_positions (Client_ID, Product_ID, Position_Amount, Transaction_Count) "
+        "SELECT Client_ID, Product_ID, SUM(Transaction_Amount), COUNT(*) FROM transactions "
+        "GROUP BY Client_ID, Product_ID"
+    )
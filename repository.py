@@ -0,0 +1,371 @@
+import json
+import base64
+import hashlib
+import datetime
+from decimal import Decimal, InvalidOperation
+
+
+def parse_date(value):
+    return datetime.date.fromisoformat(value)
+
+
+def parse_decimal(value):
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(value)
+    if not amount.is_finite():
+        raise ValueError(value)
+    return amount
+
+
+def encode_cursor(last_id):
+    payload = json.dumps({"id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        return None
+    return last_id
+
+
+def parse_page_args(args, default_limit, max_limit):
+    """Return ``(limit, after_id, None)`` or ``(None, None, error)``."""
+    try:
+        limit = int(args.get("limit", default_limit))
+    except ValueError:
+        return None, None, "limit must be an integer"
+    if limit < 1 or limit > max_limit:
+        return None, None, f"limit must be between 1 and {max_limit}"
+
+    after_id = None
+    after = args.get("after")
+    if after is not None:
+        after_id = decode_cursor(after)
+        if after_id is None:
+            return None, None, "Invalid pagination cursor"
+    return limit, after_id, None
+
+
+def parse_filters(filters, args, table=None):
+    """Turn query parameters into ``[(condition, value)]``, or ``(None, error)``.
+
+    ``filters`` maps a parameter name to ``(column, operator, parse)``; each
+    parameter present becomes a parameterized ``column op %s`` condition,
+    with the column qualified by ``table`` if one is given.
+    """
+    conditions = []
+    for param, (column, op, parse) in filters.items():
+        raw = args.get(param)
+        if raw is None:
+            continue
+        try:
+            value = parse(raw)
+        except ValueError:
+            return None, f"Invalid value for {param}"
+        if table:
+            column = f"{table}.{column}"
+        conditions.append((f"{column} {op} %s", value))
+    return conditions, None
+
+
+class Relation:
+    """A foreign key that ``?include=<name>`` resolves with a LEFT JOIN.
+
+    The joined table is aliased as ``name`` and its row is nested under that
+    key in the response, or ``null`` when the key matches nothing.
+    """
+
+    def __init__(self, name, key, target):
+        self.name = name
+        self.key = key
+        self.target = target
+
+    def join_sql(self, resource):
+        return (
+            f"LEFT JOIN {self.target.table} AS {self.name} "
+            f"ON {self.name}.{self.target.id_column} = {resource.table}.{resource.column_for[self.key]}"
+        )
+
+    def select_list(self):
+        return ", ".join(f"{self.name}.{column}" for column in self.target.columns)
+
+
+class Resource:
+    """A table exposed by the API and the SQL used to write it.
+
+    ``fields`` maps JSON keys to columns, primary key first. Every write is a
+    single statement; callers use ``rowcount`` to tell a missing row from a
+    changed one instead of reading the row back. ``parsers`` maps JSON keys
+    to functions that turn the submitted value's text into a column value,
+    raising ``ValueError`` if it is not one.
+    """
+
+    def __init__(self, table, label, fields, create_error, update_error, filters=None, relations=(), parsers=None):
+        self.table = table
+        self.label = label
+        self.fields = fields
+        self.filters = filters or {}
+        self.parsers = parsers or {}
+        self.relations = {relation.name: relation for relation in relations}
+        self.create_error = create_error
+        self.update_error = update_error
+
+        self.keys = [key for key, _ in fields]
+        self.columns = [column for _, column in fields]
+        self.column_for = dict(fields)
+        self.id_key = self.keys[0]
+        self.id_column = self.columns[0]
+
+        placeholders = ", ".join(["%s"] * len(self.columns))
+        assignments = ", ".join(f"{column} = %s" for column in self.columns[1:])
+        self.insert_sql = f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES ({placeholders})"
+        self.update_sql = f"UPDATE {table} SET {assignments} WHERE {self.id_column} = %s"
+        self.delete_sql = f"DELETE FROM {table} WHERE {self.id_column} = %s"
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {table} WHERE {self.id_column} = %s"
+
+    def to_dict(self, row):
+        return dict(zip(self.keys, row))
+
+    def parse_fields(self, raw):
+        """Turn a ``?fields=`` value into JSON keys, or ``(None, error)``."""
+        if not raw:
+            return self.keys, None
+        keys = list(dict.fromkeys(key.strip() for key in raw.split(",") if key.strip()))
+        unknown = [key for key in keys if key not in self.column_for]
+        if unknown:
+            return None, f"Unknown field(s): {', '.join(unknown)}"
+        if not keys:
+            return self.keys, None
+        return keys, None
+
+    def parse_includes(self, raw):
+        """Turn an ``?include=`` value into relations, or ``(None, error)``."""
+        if not raw:
+            return [], None
+        names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+        unknown = [name for name in names if name not in self.relations]
+        if unknown:
+            return None, f"Unknown include(s): {', '.join(unknown)}"
+        return [self.relations[name] for name in names], None
+
+    def parse_filters(self, args, qualified=False):
+        return parse_filters(self.filters, args, self.table if qualified else None)
+
+    def projection(self, keys):
+        """Keys to select for ``keys``, primary key first for pagination."""
+        return [self.id_key] + [key for key in keys if key != self.id_key]
+
+    def nested_layout(self, selected, relations):
+        """``(name, offset, keys)`` for each relation joined after ``selected``."""
+        layout = []
+        offset = len(selected)
+        for relation in relations:
+            layout.append((relation.name, offset, tuple(relation.target.keys)))
+            offset += len(relation.target.keys)
+        return tuple(layout)
+
+    def select_list(self, selected, qualified=False):
+        prefix = f"{self.table}." if qualified else ""
+        return ", ".join(prefix + self.column_for[key] for key in selected)
+
+
+EMPLOYEES = Resource(
+    "employees", "Employee",
+    [("employee_ID", "Employee_ID"), ("name", "Name")],
+    create_error="Employee ID and name are required",
+    update_error="Name is required",
+)
+
+CLIENTS = Resource(
+    "clients", "Client",
+    [
+        ("client_ID", "Client_ID"),
+        ("name", "Name"),
+        ("email", "Email"),
+        ("phone", "Phone"),
+        ("client_Manager_Employee_ID", "Client_Manager_Employee_ID"),
+    ],
+    create_error="Missing required fields",
+    update_error="Missing required fields",
+    relations=[Relation("manager", "client_Manager_Employee_ID", EMPLOYEES)],
+)
+
+PRODUCTS = Resource(
+    "products", "Product",
+    [("product_ID", "Product_ID"), ("product_Type", "Product_Type")],
+    create_error="Missing required fields",
+    update_error="Product Type is required",
+)
+
+TRANSACTIONS = Resource(
+    "transactions", "Transaction",
+    [
+        ("transaction_ID", "Transaction_ID"),
+        ("client_ID", "Client_ID"),
+        ("product_ID", "Product_ID"),
+        ("transaction_Amount", "Transaction_Amount"),
+        ("transaction_Date", "Transaction_Date"),
+    ],
+    create_error="Missing required fields",
+    update_error="Missing required fields",
+    filters={
+        "client_ID": ("Client_ID", "=", int),
+        "product_ID": ("Product_ID", "=", int),
+        "from": ("Transaction_Date", ">=", parse_date),
+        "to": ("Transaction_Date", "<=", parse_date),
+        "min_amount": ("Transaction_Amount", ">=", parse_decimal),
+        "max_amount": ("Transaction_Amount", "<=", parse_decimal),
+    },
+    relations=[
+        Relation("client", "client_ID", CLIENTS),
+        Relation("product", "product_ID", PRODUCTS),
+    ],
+    parsers={"transaction_Amount": parse_decimal, "transaction_Date": parse_date},
+)
+
+CASH_FLOWS = Resource(
+    "cash_flows", "Cash flow",
+    [
+        ("cash_Flow_ID", "Cash_Flow_ID"),
+        ("client_ID", "Client_ID"),
+        ("cash_Flow_Amount", "Cash_Flow_Amount"),
+        ("cash_Flow_Date", "Cash_Flow_Date"),
+    ],
+    create_error="Missing required fields",
+    update_error="Missing required fields",
+    filters={
+        "client_ID": ("Client_ID", "=", int),
+        "from": ("Cash_Flow_Date", ">=", parse_date),
+        "to": ("Cash_Flow_Date", "<=", parse_date),
+    },
+)
+
+
+def page_query(resource, selected, conditions, after_id, limit, includes=()):
+    """The keyset-paginated list SELECT, as ``(sql, params)``."""
+    # Included relations are LEFT JOINed, so every column is qualified to
+    # keep names such as Client_ID unambiguous.
+    qualified = bool(includes)
+    id_column = f"{resource.table}.{resource.id_column}" if qualified else resource.id_column
+    select_list = resource.select_list(selected, qualified)
+    for relation in includes:
+        select_list += ", " + relation.select_list()
+    sql = f"SELECT {select_list} FROM {resource.table}"
+    for relation in includes:
+        sql += " " + relation.join_sql(resource)
+    where = [condition for condition, _ in conditions]
+    params = [value for _, value in conditions]
+    if after_id is not None:
+        where.append(f"{id_column} > %s")
+        params.append(after_id)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {id_column}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, tuple(params)
+
+
+def versions_query(tables):
+    placeholders = ", ".join(["%s"] * len(tables))
+    return (
+        f"SELECT Table_Name, Version FROM table_versions WHERE Table_Name IN ({placeholders})",
+        tuple(tables),
+    )
+
+
+def combine_versions(tables, rows):
+    """One version string for ``tables`` from ``versions_query`` rows, or None."""
+    versions = dict(rows)
+    if any(table not in versions for table in tables):
+        return None
+    return ".".join(str(versions[table]) for table in tables)
+
+
+def page_etag(table, version, query_string):
+    """ETag of a list page: the tables' version plus a digest of the query, or None."""
+    if version is None:
+        return None
+    query_digest = hashlib.sha1(query_string).hexdigest()[:16]
+    return f"{table}-{version}-{query_digest}"
+
+
+def empty_page_error(resource, rows, after_id):
+    """The 404 message for a first page without rows, else None.
+
+    Past the first page an empty result just means the listing has ended.
+    """
+    if not rows and after_id is None:
+        return f"No {resource.table} found"
+    return None
+
+
+def trim_page(resource, rows, limit, after_id, args):
+    """Turn the ``limit + 1`` rows fetched by ``page_query`` into a page.
+
+    Returns ``(rows, next_args, None)``, where ``next_args`` is ``args`` with
+    the next page's ``limit`` and ``after`` (or None on the last page), or
+    ``(None, None, error)`` for an empty first page.
+    """
+    error = empty_page_error(resource, rows, after_id)
+    if error:
+        return None, None, error
+    next_args = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_args = dict(args)
+        next_args["limit"] = limit
+        next_args["after"] = encode_cursor(rows[-1][0])
+    return rows, next_args, None
+
+
+def validate(resource, data, with_id=True):
+    """Return ``(values, None)`` in column order, or ``(None, error)``."""
+    if not isinstance(data, dict):
+        return None, f"{resource.label} must be a JSON object"
+    keys = resource.keys if with_id else resource.keys[1:]
+    values = tuple(data.get(key) for key in keys)
+    if not all(values):
+        return None, resource.create_error if with_id else resource.update_error
+    if resource.parsers:
+        values = list(values)
+        for position, key in enumerate(keys):
+            parse = resource.parsers.get(key)
+            if parse is None:
+                continue
+            try:
+                values[position] = parse(str(values[position]))
+            except ValueError:
+                return None, "Invalid amount or date"
+        values = tuple(values)
+    return values, None
+
+
+def insert(cursor, resource, values):
+    cursor.execute(resource.insert_sql, values)
+    return cursor.rowcount
+
+
+def update(cursor, resource, resource_id, values):
+    # Relies on CLIENT.FOUND_ROWS so an UPDATE that matches a row but
+    # changes nothing still reports it.
+    cursor.execute(resource.update_sql, values + (resource_id,))
+    return cursor.rowcount
+
+
+def delete(cursor, resource, resource_id):
+    cursor.execute(resource.delete_sql, (resource_id,))
+    return cursor.rowcount
+
+
+def fetch(cursor, resource, resource_id):
+    cursor.execute(resource.select_sql, (resource_id,))
+    return cursor.fetchone()
@@ -0,0 +1,107 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """In-process read-through cache with TTL and LRU eviction.
+
+    Keys live in namespaces (one per table). Invalidating a namespace bumps
+    its generation, so every older entry becomes unreachable at once and is
+    aged out by the LRU rather than scanned for.
+
+    ``get`` returns the value (or None) with the generation it looked under;
+    pass that generation back to ``set`` so a page read before an
+    invalidation is never stored under the generation that follows it.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, namespace, key):
+        with self._lock:
+            generation = self._generations.get(namespace, 0)
+            full_key = (namespace, generation, key)
+            entry = self._entries.get(full_key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[full_key]
+                self._misses += 1
+                return None, generation
+            self._entries.move_to_end(full_key)
+            self._hits += 1
+            return entry[1], generation
+
+    def set(self, namespace, key, value, generation):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self._generations.get(namespace, 0):
+                # Invalidated since the caller's get: the value may be stale.
+                return
+            full_key = (namespace, generation, key)
+            self._entries[full_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+class RedisResponseCache:
+    """Same interface as :class:`ResponseCache`, shared through Redis.
+
+    Each namespace has a generation counter in Redis, so an invalidation
+    from any worker is seen by all of them. Values must be JSON-serializable.
+    """
+
+    def __init__(self, url, ttl, prefix="private_banking:cache"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._hits = 0
+        self._misses = 0
+
+    def _key(self, namespace, generation, key):
+        return f"{self.prefix}:{namespace}:{generation}:{key}"
+
+    def get(self, namespace, key):
+        generation = int(self.client.get(f"{self.prefix}:{namespace}:gen") or 0)
+        value = self.client.get(self._key(namespace, generation, key))
+        if value is None:
+            self._misses += 1
+            return None, generation
+        self._hits += 1
+        return json.loads(value), generation
+
+    def set(self, namespace, key, value, generation):
+        # An entry under a generation that has since been bumped is never
+        # read, so there is no need to check it here.
+        self.client.set(self._key(namespace, generation, key), json.dumps(value), ex=max(int(self.ttl), 1))
+
+    def invalidate(self, namespace):
+        self.client.incr(f"{self.prefix}:{namespace}:gen")
+
+    def stats(self):
+        return {"backend": "redis", "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,178 @@
+"""Row serializers for list responses.
+
+Each serializer turns projected result rows straight into the JSON text
+``jsonify`` would have produced (compact, sorted keys, ``Decimal`` as a
+string, dates as HTTP dates), without going through Flask's generic
+provider. Select one with ``JSON_SERIALIZER``:
+
+- ``"template"`` (default): per-projection encoders compiled once and cached
+- ``"orjson"``: the ``orjson`` package, which must be installed
+- ``"jsonify"``: Flask's own provider, as before
+
+``rows``/``row`` take an optional ``nested`` layout, as built by
+``Resource.nested_layout``, for relations embedded with ``?include=``.
+
+``orjson`` has to call back into Python for every ``Decimal`` and date, so
+on our rows it is no faster than ``template``; run
+``benchmarks/bench_serialization.py`` to compare on your own hardware.
+"""
+import json
+import datetime
+import functools
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+
+from flask import jsonify
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# A page holds few distinct dates, and formatting one is the most expensive
+# part of encoding a row.
+_http_date = functools.lru_cache(maxsize=4096)(http_date)
+
+
+def _default(value):
+    # Same conversions as flask.json.provider._default for the types our
+    # tables hold.
+    if isinstance(value, datetime.date):
+        return _http_date(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_other(value):
+    return json.dumps(value, default=_default, separators=(",", ":"), sort_keys=True)
+
+
+@functools.lru_cache(maxsize=4096)
+def _encode_date(value):
+    return '"' + http_date(value) + '"'
+
+
+_ENCODERS = {
+    int: int.__repr__,
+    str: encode_basestring_ascii,
+    type(None): lambda value: "null",
+    bool: lambda value: "true" if value else "false",
+    Decimal: lambda value: '"' + str(value) + '"',
+    datetime.date: _encode_date,
+    datetime.datetime: _encode_date,
+}
+
+
+def encode_value(value):
+    encoder = _ENCODERS.get(type(value))
+    return encoder(value) if encoder else _encode_other(value)
+
+
+def _positions(selected, keys):
+    return [selected.index(key) for key in keys]
+
+
+def _value_source(position):
+    return f"G(T(row[{position}]), O)(row[{position}])"
+
+
+def _object_source(members):
+    # ``members`` is [(key, expression)]; keys are emitted sorted, as
+    # jsonify does, with the constant '{"key":' fragments inlined.
+    parts = []
+    for n, (key, expression) in enumerate(sorted(members)):
+        literal = ("{" if n == 0 else ",") + encode_basestring_ascii(key) + ":"
+        parts.append(f"{literal!r} + {expression}")
+    if not parts:
+        return "'{}'"
+    return " + ".join(parts) + " + '}'"
+
+
+def _build_dict(positions, keys, nested, row):
+    obj = {key: row[position] for key, position in zip(keys, positions)}
+    for name, offset, related_keys in nested:
+        if row[offset] is None:
+            obj[name] = None
+        else:
+            obj[name] = dict(zip(related_keys, row[offset:offset + len(related_keys)]))
+    return obj
+
+
+class TemplateSerializer:
+    name = "template"
+
+    def __init__(self):
+        self._encoders = {}
+
+    def _row_encoder(self, selected, keys, nested):
+        cache_key = (tuple(selected), tuple(keys), nested)
+        encoder = self._encoders.get(cache_key)
+        if encoder is None:
+            encoder = self._compile(_positions(selected, keys), keys, nested)
+            self._encoders[cache_key] = encoder
+        return encoder
+
+    @staticmethod
+    def _compile(positions, keys, nested):
+        members = [(key, _value_source(position)) for key, position in zip(keys, positions)]
+        for name, offset, related_keys in nested:
+            related = _object_source([
+                (key, _value_source(offset + n)) for n, key in enumerate(related_keys)
+            ])
+            members.append((name, f"('null' if row[{offset}] is None else {related})"))
+        source = "def encode(row):\n    return " + _object_source(members) + "\n"
+        namespace = {"G": _ENCODERS.get, "T": type, "O": _encode_other}
+        exec(source, namespace)
+        return namespace["encode"]
+
+    def rows(self, selected, keys, rows, nested=()):
+        encode = self._row_encoder(selected, keys, nested)
+        return "[" + ",".join([encode(row) for row in rows]) + "]\n"
+
+    def row(self, selected, keys, row, nested=()):
+        return self._row_encoder(selected, keys, nested)(row)
+
+
+class OrjsonSerializer:
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("JSON_SERIALIZER = 'orjson' requires the orjson package")
+        self._option = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps(self, obj):
+        return orjson.dumps(obj, default=_default, option=self._option).decode("utf-8")
+
+    def rows(self, selected, keys, rows, nested=()):
+        positions = _positions(selected, keys)
+        return self._dumps([_build_dict(positions, keys, nested, row) for row in rows]) + "\n"
+
+    def row(self, selected, keys, row, nested=()):
+        return self._dumps(_build_dict(_positions(selected, keys), keys, nested, row))
+
+
+class JsonifySerializer:
+    name = "jsonify"
+
+    def rows(self, selected, keys, rows, nested=()):
+        positions = _positions(selected, keys)
+        return jsonify([_build_dict(positions, keys, nested, row) for row in rows]).get_data(as_text=True)
+
+    def row(self, selected, keys, row, nested=()):
+        obj = _build_dict(_positions(selected, keys), keys, nested, row)
+        return jsonify(obj).get_data(as_text=True).rstrip("\n")
+
+
+def make_serializer(backend):
+    serializers = {
+        "template": TemplateSerializer,
+        "orjson": OrjsonSerializer,
+        "jsonify": JsonifySerializer,
+    }
+    if backend not in serializers:
+        raise ValueError(f"Unknown JSON_SERIALIZER: {backend}")
+    return serializers[backend]()
@@ -0,0 +1,318 @@
+"""Pre-fork launcher for app.py (POSIX only).
+
+Usage:
+    python server.py [--host HOST] [--port PORT] [--workers N]
+                     [--keep-alive SECONDS] [--graceful-timeout SECONDS]
+                     [--metrics-dir DIR]
+
+The master binds the listening socket, imports the app once and forks
+``--workers`` processes (default: one per core this process may run on).
+Each worker opens its pool's ``MYSQL_POOL_MIN_SIZE`` connections and fills
+the response cache for ``CACHED_TABLES`` (with more than one worker, only
+when ``CACHE_REDIS_URL`` shares it), then serves the shared socket with
+werkzeug's threaded WSGI server and reports ready to the master. Workers
+that die are replaced. Configure the app with ``BANKING_*`` environment
+variables (see ``create_app``).
+
+Workers publish their metrics to a shared directory (``--metrics-dir``), so
+``/metrics`` on any worker reports the totals of all of them.
+
+Signals to the master:
+
+- ``TERM``/``INT``: stop accepting, let in-flight requests finish, exit.
+- ``HUP``: reload. The master checks that the app still imports, then
+  re-executes itself in place (same PID, same socket) to load the new code
+  and starts new workers; the old ones are stopped only once every new
+  worker is ready, so no request is refused during the switch.
+"""
+import os
+import sys
+import time
+import select
+import signal
+import socket
+import logging
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+LISTEN_FD_ENV = "SERVER_LISTEN_FD"
+OLD_WORKERS_ENV = "SERVER_OLD_WORKERS"
+METRICS_DIR_ENV = "SERVER_METRICS_DIR"
+RESPAWN_DELAY = 1.0
+
+log = logging.getLogger("server")
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def listen(host, port, backlog):
+    """The listening socket, inherited across a reload or freshly bound."""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is not None:
+        return socket.socket(fileno=int(fd))
+    return socket.create_server((host, port), backlog=backlog)
+
+
+def disable_unshared_cache(app, workers):
+    """Turn the response cache off when workers could not see each other's
+    invalidations: without ``CACHE_REDIS_URL`` each worker caches alone, and
+    a write through one would leave the others serving stale pages."""
+    if workers > 1 and app.config["CACHED_TABLES"] and not app.config["CACHE_REDIS_URL"]:
+        log.warning("response cache disabled: set CACHE_REDIS_URL to cache with %d workers", workers)
+        app.config["CACHED_TABLES"] = []
+
+
+def metrics_directory(configured):
+    """Where workers publish their metrics, and whether to remove it on exit.
+
+    Without ``--metrics-dir`` a temporary directory is made; it is kept in
+    the environment so a reload (and the previous generation's workers)
+    keeps using it.
+    """
+    if configured:
+        return configured, False
+    directory = os.environ.get(METRICS_DIR_ENV)
+    if directory is None:
+        directory = os.environ[METRICS_DIR_ENV] = tempfile.mkdtemp(prefix="banking-metrics-")
+    return directory, True
+
+
+def warm(app_module, app):
+    """Open the pool's minimum connections and fill the response cache."""
+    try:
+        app_module.mysql.get_pool(app).warm()
+    except Exception:
+        log.exception("[%d] could not warm the connection pool", os.getpid())
+    client = app.test_client()
+    for table in app.config["CACHED_TABLES"]:
+        client.get(f"/{table}").close()
+
+
+def serve(app_module, app, sock, ready_fd, keep_alive):
+    """Body of a worker process; returns once it has been told to stop."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+
+    class RequestHandler(WSGIRequestHandler):
+        # Bounds how long an idle keep-alive connection can hold up shutdown.
+        timeout = keep_alive
+
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, request_handler=RequestHandler, fd=sock.fileno())
+    sock.close()
+    # Finish in-flight requests on shutdown instead of abandoning them.
+    server.daemon_threads = False
+    server.block_on_close = True
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever(), which runs on this thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    warm(app_module, app)
+    try:
+        os.write(ready_fd, b"1")
+    except OSError:
+        pass
+    os.close(ready_fd)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        app.extensions["transaction_committer"].stop()
+        app_module.metrics.flush()
+
+
+class Worker:
+    def __init__(self, pid, ready_fd=None, retiring=False):
+        self.pid = pid
+        self.ready_fd = ready_fd
+        self.ready = ready_fd is None
+        self.retiring = retiring
+        self.signalled = False
+
+
+class Master:
+    def __init__(self, app_module, app, sock, workers, keep_alive, graceful_timeout):
+        self.app_module = app_module
+        self.app = app
+        self.sock = sock
+        self.target = workers
+        self.keep_alive = keep_alive
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}
+        self.stop_deadline = None
+        self.last_failure = 0.0
+
+    def run(self):
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        signal.set_wakeup_fd(wakeup_w)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, lambda signum, frame: None)
+
+        # A reload re-executes the master in place, so the previous
+        # generation's workers are still our children.
+        for pid in os.environ.pop(OLD_WORKERS_ENV, "").split(","):
+            if pid:
+                self.workers[int(pid)] = Worker(int(pid), retiring=True)
+
+        log.info("master %d serving on %s with %d workers", os.getpid(), self.sock.getsockname(), self.target)
+        while self.stop_deadline is None or self.workers:
+            if self.stop_deadline is None:
+                self.spawn_missing()
+                self.retire_old()
+            elif time.monotonic() > self.stop_deadline:
+                self.kill_all(signal.SIGKILL)
+
+            waiting = [w.ready_fd for w in self.workers.values() if not w.ready]
+            readable, _, _ = select.select([wakeup_r] + waiting, [], [], 1.0)
+            if wakeup_r in readable:
+                self.handle_signals(os.read(wakeup_r, 64))
+            self.collect_ready([fd for fd in readable if fd != wakeup_r])
+            self.reap()
+        log.info("master %d stopped", os.getpid())
+
+    def handle_signals(self, received):
+        for signum in received:
+            if signum in (signal.SIGTERM, signal.SIGINT) and self.stop_deadline is None:
+                log.info("stopping; waiting up to %ss for in-flight requests", self.graceful_timeout)
+                self.stop_deadline = time.monotonic() + self.graceful_timeout
+                self.kill_all(signal.SIGTERM)
+            elif signum == signal.SIGHUP and self.stop_deadline is None:
+                self.reload()
+
+    def spawn_missing(self):
+        current = sum(1 for w in self.workers.values() if not w.retiring)
+        if current >= self.target or time.monotonic() - self.last_failure < RESPAWN_DELAY:
+            return
+        for _ in range(self.target - current):
+            self.spawn()
+
+    def spawn(self):
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                os.close(ready_r)
+                serve(self.app_module, self.app, self.sock, ready_w, self.keep_alive)
+            except BaseException:
+                log.exception("worker %d failed", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        os.close(ready_w)
+        self.workers[pid] = Worker(pid, ready_r)
+
+    def collect_ready(self, fds):
+        for worker in list(self.workers.values()):
+            if worker.ready_fd in fds:
+                if os.read(worker.ready_fd, 1):
+                    worker.ready = True
+                    log.info("worker %d ready", worker.pid)
+                os.close(worker.ready_fd)
+                worker.ready_fd = None
+
+    def retire_old(self):
+        fresh = [w for w in self.workers.values() if not w.retiring]
+        if len(fresh) < self.target or not all(w.ready for w in fresh):
+            return
+        for worker in self.workers.values():
+            if worker.retiring and not worker.signalled:
+                self.signal(worker, signal.SIGTERM)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+            if not worker.signalled:
+                log.warning("worker %d exited unexpectedly (status %d)", pid, status)
+                if not worker.ready:
+                    self.last_failure = time.monotonic()
+
+    def signal(self, worker, signum):
+        worker.signalled = True
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def kill_all(self, signum):
+        for worker in list(self.workers.values()):
+            self.signal(worker, signum)
+
+    def reload(self):
+        # Do not exec into code that cannot even be imported.
+        here = os.path.dirname(os.path.abspath(__file__))
+        check = subprocess.run([sys.executable, "-c", "import app"], cwd=here, env=os.environ)
+        if check.returncode != 0:
+            log.error("reload aborted: app.py failed to import; keeping the current workers")
+            return
+        if any(not w.ready for w in self.workers.values()):
+            log.error("reload aborted: workers are still starting")
+            return
+        log.info("reloading")
+        self.sock.set_inheritable(True)
+        env = dict(os.environ)
+        env[LISTEN_FD_ENV] = str(self.sock.fileno())
+        env[OLD_WORKERS_ENV] = ",".join(str(pid) for pid in self.workers)
+        logging.shutdown()
+        os.execve(sys.executable, sys.orig_argv, env)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve app.py from a pre-forked pool of worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=float, default=5, help="idle keep-alive timeout in seconds")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="seconds workers get to finish in-flight requests before being killed")
+    parser.add_argument("--metrics-dir", help="directory where workers share their metrics "
+                        "(default: a temporary directory removed on exit)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    sock = listen(args.host, args.port, args.backlog)
+    # Preload: workers inherit the imported app instead of each importing it.
+    import app as app_module
+
+    disable_unshared_cache(app_module.app, args.workers)
+    directory, temporary = metrics_directory(args.metrics_dir)
+    app_module.metrics.share(directory)
+    Master(app_module, app_module.app, sock, args.workers, args.keep_alive, args.graceful_timeout).run()
+    if temporary:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Opt-in slow-query log with one ``EXPLAIN`` per statement shape.
+
+Statements whose ``execute``/``executemany`` takes at least the threshold
+are written to a rotating log as JSON lines, with parameters replaced by
+their type names. The first time a slow ``SELECT``, ``UPDATE`` or
+``DELETE`` of a given shape is seen, its plan is captured by a background
+thread on a connection of its own, so the request's cursor (which may be
+an unbuffered ``SSCursor`` mid-result) is never touched and the request
+does not wait for it.
+"""
+import os
+import re
+import json
+import time
+import queue
+import hashlib
+import logging
+import datetime
+import threading
+from logging.handlers import RotatingFileHandler
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(sql):
+    """``sql`` with literals and placeholders replaced by ``?``."""
+    shape = _STRING.sub("?", sql)
+    shape = shape.replace("%s", "?")
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?+)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:16]
+
+
+def redact(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """A :class:`RotatingFileHandler` that several processes may share.
+
+    The file is opened on the first record, so a pre-fork master never
+    holds it, and reopened when this process was forked from the one that
+    opened it or another process has rotated it away. A worker therefore
+    never keeps writing to, and rotating, a file that is already a backup.
+    """
+
+    def __init__(self, path, max_bytes, backups):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backups, delay=True)
+        self._opened = None
+
+    def _open(self):
+        stream = super()._open()
+        stat = os.fstat(stream.fileno())
+        self._opened = (os.getpid(), stat.st_dev, stat.st_ino)
+        return stream
+
+    def emit(self, record):
+        # Called with the handler's lock held.
+        if self.stream is not None:
+            try:
+                stat = os.stat(self.baseFilename)
+                current = (os.getpid(), stat.st_dev, stat.st_ino)
+            except FileNotFoundError:
+                current = None
+            if current != self._opened:
+                self.stream.close()
+                self.stream = None
+        super().emit(record)
+
+
+def make_logger(path, max_bytes, backups):
+    logger = logging.getLogger(f"slow_queries.{os.path.abspath(path)}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = SharedRotatingFileHandler(path, max_bytes, backups)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+class SlowQueryLog:
+    """Logs slow statements to ``logger``.
+
+    ``explain(sql, params)`` must run ``EXPLAIN`` on a connection of its own
+    and return a list of dicts; it is called from a background thread. Pass
+    ``None`` to skip plans. ``context()`` returns extra fields (the route,
+    say) for each entry.
+    """
+
+    def __init__(self, logger, threshold, explain=None, context=None, max_pending=100):
+        self.logger = logger
+        self.threshold = threshold
+        self.explain = explain
+        self.context = context
+        self._explained = set()
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._logged = 0
+        self._explains = 0
+
+    def wrap_cursor(self, cursor):
+        return ProfiledCursor(cursor, self)
+
+    def _write(self, entry):
+        entry["ts"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.logger.info(json.dumps(entry, default=str, sort_keys=True))
+
+    def record(self, sql, params, elapsed, many=False, rowcount=None):
+        shape = statement_shape(sql)
+        digest = fingerprint(shape)
+        entry = {
+            "event": "slow_query",
+            "fingerprint": digest,
+            "statement": shape,
+            "duration_ms": round(elapsed * 1000, 3),
+            "rowcount": rowcount,
+        }
+        if many:
+            entry["rows"] = len(params)
+            entry["params"] = redact(params[0]) if params else None
+        else:
+            entry["params"] = redact(params)
+        if self.context is not None:
+            entry.update(self.context())
+        self._write(entry)
+        with self._lock:
+            self._logged += 1
+            first_seen = digest not in self._explained
+            if first_seen:
+                self._explained.add(digest)
+        if first_seen and not many and self.explain is not None and shape.upper().startswith(EXPLAINABLE):
+            self._queue_explain(digest, shape, sql, params)
+
+    def _queue_explain(self, digest, shape, sql, params):
+        self._ensure_started()
+        try:
+            self._pending.put_nowait((digest, shape, sql, params))
+        except queue.Full:
+            # Let a later occurrence of the statement try again.
+            with self._lock:
+                self._explained.discard(digest)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            digest, shape, sql, params = self._pending.get()
+            entry = {"event": "explain", "fingerprint": digest, "statement": shape}
+            try:
+                entry["plan"] = self.explain(sql, params)
+            except Exception as exc:
+                entry["error"] = str(exc)
+            self._write(entry)
+            with self._lock:
+                self._explains += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_ms": round(self.threshold * 1000, 3),
+                "logged": self._logged,
+                "shapes": len(self._explained),
+                "explains": self._explains,
+            }
+
+
+class ProfiledCursor:
+    """Times ``execute``/``executemany`` and reports slow ones."""
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        result = self._cursor.execute(sql, params)
+        elapsed = time.perf_counter() - start
+        if elapsed >= self._log.threshold:
+            self._log.record(sql, params, elapsed, rowcount=self._cursor.rowcount)
+        return result
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        start = time.perf_counter()
+        result = self._cursor.executemany(sql, rows)
+        elapsed = time.perf_counter() - start
+        if elapsed >= self._log.threshold:
+            self._log.record(sql, rows, elapsed, many=True, rowcount=self._cursor.rowcount)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from admission import AdmissionControl, RateLimiter, RouteLimiter, PriorityGate, RateLimited, Overloaded
+
+def test_rate_limiter_allows_burst_then_limits():
+    limiter = RateLimiter(rate=0.5, burst=2)
+    limiter.take("alice")
+    limiter.take("alice")
+    with pytest.raises(RateLimited) as exc:
+        limiter.take("alice")
+
+    assert exc.value.retry_after == 2
+    limiter.take("bob")
+    assert limiter.stats() == {"clients": 2, "limited": 1}
+
+def test_route_limiter_rejects_over_limit():
+    limiter = RouteLimiter({"GET /transactions": 1})
+    assert limiter.acquire("GET /transactions")
+    with pytest.raises(Overloaded):
+        limiter.acquire("GET /transactions")
+    assert not limiter.acquire("POST /transactions")
+
+    limiter.release("GET /transactions")
+    assert limiter.acquire("GET /transactions")
+
+def test_gate_keeps_reserve_for_writes():
+    gate = PriorityGate(limit=2, write_reserve=1, max_waiting=0, timeout=0)
+    gate.acquire(write=False)
+    with pytest.raises(Overloaded):
+        gate.acquire(write=False)
+    gate.acquire(write=True)
+
+    assert gate.stats()["in_flight"] == 2
+
+def test_gate_admits_waiting_write_before_waiting_read():
+    gate = PriorityGate(limit=1, write_reserve=0, max_waiting=2, timeout=5)
+    gate.acquire(write=True)
+    order = []
+
+    def request(write):
+        gate.acquire(write)
+        order.append("write" if write else "read")
+        gate.release(write)
+
+    reader = threading.Thread(target=request, args=(False,))
+    reader.start()
+    while gate.stats()["waiting_reads"] == 0:
+        pass
+    writer = threading.Thread(target=request, args=(True,))
+    writer.start()
+    while gate.stats()["waiting_writes"] == 0:
+        pass
+    gate.release(write=True)
+    reader.join()
+    writer.join()
+
+    assert order == ["write", "read"]
+
+def test_admission_releases_route_slot_when_gate_rejects():
+    routes = RouteLimiter({"GET /transactions": 1})
+    control = AdmissionControl(route_limiter=routes, gate=PriorityGate(1, 0, 0, 0))
+    release = control.admit("addr:127.0.0.1", "GET /clients", False)
+    with pytest.raises(Overloaded):
+        control.admit("addr:127.0.0.1", "GET /transactions", False)
+
+    assert routes.stats()["in_flight"] == {"GET /transactions": 0}
+    release()
+
+def test_admission_enabled_only_with_a_limiter():
+    assert not AdmissionControl().enabled
+    assert AdmissionControl(gate=PriorityGate(limit=1, write_reserve=0, max_waiting=0, timeout=0)).enabled
@@ -1,6 +1,22 @@
+import gzip
+import datetime
+from decimal import Decimal
+import jwt
 import pytest
 from app import app
 
+def admin_headers():
+    token = jwt.encode(
+        {
+            "user_id": "admin",
+            "role": "admin",
+            "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1),
+        },
+        app.config["SECRET_KEY"],
+        algorithm="HS256",
+    )
+    return {"x-access-token": token}
+
 @pytest.fixture
 def mock_db(mocker):
 
@@ -16,6 +32,11 @@ def mock_db(mocker):
     
     return mock_cursor
 
+@pytest.fixture(autouse=True)
+def fresh_response_cache(mocker):
+    from response_cache import ResponseCache
+    mocker.patch.dict(app.extensions, {'response_cache': ResponseCache(256, 60)})
+
 def test_index():
     client = app.test_client()
     response = client.get('/')
@@ -257,4 +278,760 @@ def test_delete_transaction_success(mock_db):
 
     assert response.status_code == 200
     assert b"Transaction with ID 1 has been deleted." in response.data
-    
\ No newline at end of file
+    
+
+def test_get_transactions_next_link(mock_db):
+    mock_db.fetchall.return_value = [
+        (1, 1, 1, 100, '2024-12-11'),
+        (2, 1, 1, 200, '2024-12-12'),
+        (3, 1, 1, 300, '2024-12-13'),
+    ]
+    client = app.test_client()
+    response = client.get('/transactions?limit=2')
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+    assert 'rel="next"' in response.headers['Link']
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date FROM transactions ORDER BY Transaction_ID LIMIT %s", (3,)
+    )
+
+def test_get_transactions_after_cursor(mock_db):
+    from app import encode_cursor
+    mock_db.fetchall.return_value = [(3, 1, 1, 300, '2024-12-13')]
+    client = app.test_client()
+    response = client.get(f'/transactions?limit=2&after={encode_cursor(2)}')
+
+    assert response.status_code == 200
+    assert 'Link' not in response.headers
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date FROM transactions WHERE Transaction_ID > %s ORDER BY Transaction_ID LIMIT %s", (2, 3)
+    )
+
+def test_get_clients_invalid_cursor(mock_db):
+    client = app.test_client()
+    response = client.get('/clients?after=not-a-cursor')
+
+    assert response.status_code == 400
+    assert b"Invalid pagination cursor" in response.data
+
+def test_get_products_invalid_limit(mock_db):
+    client = app.test_client()
+    response = client.get('/products?limit=0')
+
+    assert response.status_code == 400
+
+def test_get_transactions_stream(mock_db):
+    mock_db.fetchmany.side_effect = [
+        [(1, 1, 1, 100, '2024-12-11'), (2, 1, 1, 200, '2024-12-12')],
+        [(3, 1, 1, 300, '2024-12-13')],
+        [],
+    ]
+    client = app.test_client()
+    response = client.get('/transactions', headers={'Accept': 'application/x-ndjson'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.data.decode().splitlines()
+    assert len(lines) == 3
+    assert '"transaction_ID":3' in lines[2]
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date FROM transactions ORDER BY Transaction_ID", ()
+    )
+    mock_db.close.assert_called()
+
+def test_get_employees_stream_empty(mock_db):
+    mock_db.fetchmany.return_value = []
+    client = app.test_client()
+    response = client.get('/employees?stream=1')
+
+    assert response.status_code == 404
+    assert b"No employees found" in response.data
+
+def test_add_transactions_bulk(mock_db):
+    client = app.test_client()
+    response = client.post('/transactions/bulk?batch_size=2', headers=admin_headers(), json=[
+        {'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'},
+        {'transaction_ID': 2, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 200, 'transaction_Date': '2024-12-12'},
+        {'transaction_ID': 3, 'client_ID': 1},
+        {'transaction_ID': 4, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 400, 'transaction_Date': '2024-12-14'},
+    ])
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['inserted'] == 3
+    assert body['errors'] == [{'index': 2, 'error': 'Missing required fields'}]
+    from repository import TRANSACTIONS
+    inserts = [call for call in mock_db.executemany.call_args_list if call.args[0] == TRANSACTIONS.insert_sql]
+    assert len(inserts) == 2
+
+def test_add_transactions_bulk_ndjson_row_errors(mock_db):
+    import MySQLdb
+    mock_db.executemany.side_effect = [MySQLdb.IntegrityError(1062, "Duplicate entry '1'"), None]
+    mock_db.execute.side_effect = [MySQLdb.IntegrityError(1062, "Duplicate entry '1'"), None, None]
+    body = (
+        '{"transaction_ID": 1, "client_ID": 1, "product_ID": 1, "transaction_Amount": 100, "transaction_Date": "2024-12-11"}\n'
+        '{"transaction_ID": 2, "client_ID": 1, "product_ID": 1, "transaction_Amount": 200, "transaction_Date": "2024-12-12"}\n'
+        'not json\n'
+    )
+    client = app.test_client()
+    response = client.post('/transactions/bulk', headers=admin_headers(), data=body,
+                           content_type='application/x-ndjson')
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['inserted'] == 1
+    assert body['errors'] == [
+        {'index': 0, 'error': "Duplicate entry '1'"},
+        {'index': 2, 'error': 'Invalid JSON'},
+    ]
+
+def test_add_transaction_bad_amount(mock_db):
+    client = app.test_client()
+    response = client.post('/transactions', headers=admin_headers(), json={
+        'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 'abc', 'transaction_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid amount or date"}
+    mock_db.execute.assert_not_called()
+
+def test_add_transactions_bulk_bad_amount_is_a_row_error(mock_db):
+    client = app.test_client()
+    response = client.post('/transactions/bulk', headers=admin_headers(), json=[
+        {'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': True, 'transaction_Date': '2024-12-11'},
+        {'transaction_ID': 2, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 200, 'transaction_Date': '2024-12-12'},
+    ])
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['inserted'] == 1
+    assert body['errors'] == [{'index': 0, 'error': 'Invalid amount or date'}]
+
+def test_add_transactions_bulk_requires_array(mock_db):
+    client = app.test_client()
+    response = client.post('/transactions/bulk', headers=admin_headers(), json={'transaction_ID': 1})
+
+    assert response.status_code == 400
+
+def test_register_and_login(mocker, tmp_path):
+    from user_store import JsonUserStore
+    mocker.patch.dict(app.extensions, {'user_store': JsonUserStore(str(tmp_path / 'users.json'))})
+    client = app.test_client()
+
+    response = client.post('/register', json={'username': 'alice', 'password': 'secret', 'role': 'admin'})
+    assert response.status_code == 201
+    response = client.post('/register', json={'username': 'alice', 'password': 'secret', 'role': 'admin'})
+    assert response.status_code == 400
+    assert b"Username already exists" in response.data
+
+    response = client.post('/login', json={'username': 'alice', 'password': 'wrong'})
+    assert response.status_code == 401
+    response = client.post('/login', json={'username': 'alice', 'password': 'secret'})
+    assert response.status_code == 200
+    assert 'token' in response.get_json()
+
+def test_login_hashing_pool_full(mocker):
+    from password_hashing import HashingPoolFull
+    mocker.patch.object(app.extensions['user_store'], 'get', return_value={'username': 'alice', 'password': 'hash', 'role': 'admin'})
+    mocker.patch.object(app.extensions['password_hasher'], 'check_password_hash', side_effect=HashingPoolFull())
+    client = app.test_client()
+    response = client.post('/login', json={'username': 'alice', 'password': 'secret'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['BCRYPT_RETRY_AFTER'])
+
+def test_status():
+    client = app.test_client()
+    response = client.get('/status')
+
+    assert response.status_code == 200
+    assert 'rejected' in response.get_json()['auth_pool']
+
+def test_validate_token_uses_cache(mock_db, mocker):
+    mock_db.fetchone.return_value = (1, 'John Doe')
+    headers = admin_headers()
+    client = app.test_client()
+    client.delete('/employees/1', headers=headers)
+    decode = mocker.patch('app.jwt.decode')
+    response = client.delete('/employees/1', headers=headers)
+
+    assert response.status_code == 200
+    decode.assert_not_called()
+
+def test_get_products_cached(mock_db):
+    mock_db.fetchall.return_value = [(1, 'Product A')]
+    client = app.test_client()
+    client.get('/products')
+    queries = mock_db.execute.call_count
+    mock_db.fetchall.return_value = [(1, 'Product B')]
+    response = client.get('/products')
+
+    assert response.status_code == 200
+    assert b'Product A' in response.data
+    assert mock_db.execute.call_count == queries
+
+def test_get_products_cache_invalidated_by_delete(mock_db):
+    mock_db.fetchall.return_value = [(1, 'Product A')]
+    mock_db.fetchone.return_value = (1, 'Product A')
+    client = app.test_client()
+    client.get('/products')
+    client.delete('/products/1', headers=admin_headers())
+    mock_db.fetchall.return_value = [(2, 'Product B')]
+    response = client.get('/products')
+
+    assert b'Product B' in response.data
+
+def test_get_products_write_during_read_not_cached(mock_db):
+    def write_then_read():
+        # A write commits and invalidates between the cache miss and the set.
+        app.extensions['response_cache'].invalidate('products')
+        return [(1, 'Product A')]
+
+    mock_db.fetchall.side_effect = write_then_read
+    client = app.test_client()
+    client.get('/products')
+    mock_db.fetchall.side_effect = None
+    mock_db.fetchall.return_value = [(1, 'Product B')]
+    response = client.get('/products')
+
+    assert b'Product B' in response.data
+
+def test_get_transactions_not_cached(mock_db):
+    mock_db.fetchall.return_value = [(1, 1, 1, 100, '2024-12-11')]
+    client = app.test_client()
+    client.get('/transactions')
+    mock_db.fetchall.return_value = [(2, 1, 1, 200, '2024-12-12')]
+    response = client.get('/transactions')
+
+    assert b'200' in response.data
+
+def test_get_clients_etag(mock_db):
+    mock_db.fetchone.return_value = (7,)
+    mock_db.fetchall.return_value = [(1, 'John Doe', 'john@example.com', '1234567890', 1)]
+    client = app.test_client()
+    response = client.get('/clients')
+
+    etag = response.headers['ETag']
+    assert '"clients-7-' in etag
+
+    mock_db.fetchall.reset_mock()
+    response = client.get('/clients', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    mock_db.fetchall.assert_not_called()
+
+def test_get_clients_etag_changes_with_version(mock_db):
+    mock_db.fetchone.return_value = (7,)
+    mock_db.fetchall.return_value = [(1, 'John Doe', 'john@example.com', '1234567890', 1)]
+    client = app.test_client()
+    etag = client.get('/clients').headers['ETag']
+    mock_db.fetchone.return_value = (8,)
+    response = client.get('/clients', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_add_transaction_bumps_version(mock_db):
+    mock_db.fetchone.return_value = (1, 1, 1, 100, '2024-12-11')
+    client = app.test_client()
+    client.post('/transactions', headers=admin_headers(), json={
+        'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'
+    })
+
+    mock_db.execute.assert_any_call(
+        "UPDATE table_versions SET Version = Version + 1 WHERE Table_Name = %s", ('transactions',)
+    )
+
+def test_add_client_single_round_trip(mock_db):
+    client = app.test_client()
+    response = client.post('/clients', headers=admin_headers(), json={
+        'client_ID': 1, 'name': 'John Doe', 'email': 'john@example.com', 'phone': '1234567890', 'client_Manager_Employee_ID': 1
+    })
+
+    assert response.status_code == 201
+    assert response.get_json()['email'] == 'john@example.com'
+    mock_db.fetchone.assert_not_called()
+
+def test_add_product_return_full(mock_db):
+    mock_db.fetchone.return_value = (1, 'Product A')
+    client = app.test_client()
+    response = client.post('/products?return=full', headers=admin_headers(), json={'product_ID': 1, 'product_Type': 'Product A'})
+
+    assert response.status_code == 201
+    mock_db.execute.assert_called_with("SELECT Product_ID, Product_Type FROM products WHERE Product_ID = %s", (1,))
+
+def test_update_transaction_not_found(mock_db):
+    mock_db.rowcount = 0
+    client = app.test_client()
+    response = client.put('/transactions/999', headers=admin_headers(), json={
+        'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 404
+    assert b"Transaction not found" in response.data
+    mock_db.fetchone.assert_not_called()
+
+def test_delete_client_single_statement(mock_db):
+    client = app.test_client()
+    response = client.delete('/clients/1', headers=admin_headers())
+
+    assert response.status_code == 200
+    mock_db.execute.assert_any_call("DELETE FROM clients WHERE Client_ID = %s", (1,))
+    mock_db.fetchone.assert_not_called()
+
+def test_get_clients_fields(mock_db):
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    client = app.test_client()
+    response = client.get('/clients?fields=name')
+
+    assert response.status_code == 200
+    assert response.get_json() == [{'name': 'John Doe'}]
+    mock_db.execute.assert_called_with(
+        "SELECT Client_ID, Name FROM clients ORDER BY Client_ID LIMIT %s", (101,)
+    )
+
+def test_get_transactions_fields_keeps_order(mock_db):
+    mock_db.fetchall.return_value = [(1, 100, 2)]
+    client = app.test_client()
+    response = client.get('/transactions?fields=transaction_Amount,client_ID,transaction_ID')
+
+    assert response.get_json() == [{'transaction_Amount': 100, 'client_ID': 2, 'transaction_ID': 1}]
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Transaction_Amount, Client_ID FROM transactions ORDER BY Transaction_ID LIMIT %s", (101,)
+    )
+
+def test_get_clients_unknown_field(mock_db):
+    client = app.test_client()
+    response = client.get('/clients?fields=name,password')
+
+    assert response.status_code == 400
+    assert b"Unknown field(s): password" in response.data
+
+def test_get_transactions_filters(mock_db):
+    from decimal import Decimal
+    import datetime
+    mock_db.fetchall.return_value = [(1, 7, 1, 100, '2024-12-11')]
+    client = app.test_client()
+    response = client.get('/transactions?client_ID=7&from=2024-12-01&to=2024-12-31&min_amount=50')
+
+    assert response.status_code == 200
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date FROM transactions "
+        "WHERE Client_ID = %s AND Transaction_Date >= %s AND Transaction_Date <= %s AND Transaction_Amount >= %s "
+        "ORDER BY Transaction_ID LIMIT %s",
+        (7, datetime.date(2024, 12, 1), datetime.date(2024, 12, 31), Decimal('50'), 101)
+    )
+
+def test_get_transactions_filters_with_cursor(mock_db):
+    from app import encode_cursor
+    mock_db.fetchall.return_value = [(6, 7, 2, 100, '2024-12-11')]
+    client = app.test_client()
+    client.get(f'/transactions?product_ID=2&after={encode_cursor(5)}')
+
+    mock_db.execute.assert_called_with(
+        "SELECT Transaction_ID, Client_ID, Product_ID, Transaction_Amount, Transaction_Date FROM transactions "
+        "WHERE Product_ID = %s AND Transaction_ID > %s ORDER BY Transaction_ID LIMIT %s",
+        (2, 5, 101)
+    )
+
+def test_get_transactions_invalid_filter(mock_db):
+    client = app.test_client()
+    response = client.get('/transactions?from=yesterday')
+
+    assert response.status_code == 400
+    assert b"Invalid value for from" in response.data
+
+def test_get_client_positions(mock_db):
+    mock_db.fetchall.return_value = [(1, 300, 2), (2, 50, 1)]
+    client = app.test_client()
+    response = client.get('/clients/7/positions')
+
+    assert response.status_code == 200
+    assert response.get_json()[0] == {'product_ID': 1, 'position_Amount': 300, 'transaction_Count': 2}
+    mock_db.execute.assert_called_with(
+        "SELECT Product_ID, Position_Amount, Transaction_Count FROM client_positions "
+        "WHERE Client_ID = %s AND Transaction_Count > 0 ORDER BY Product_ID", (7,)
+    )
+
+def test_add_transaction_updates_position(mock_db):
+    from decimal import Decimal
+    import positions
+    client = app.test_client()
+    client.post('/transactions', headers=admin_headers(), json={
+        'transaction_ID': 1, 'client_ID': 7, 'product_ID': 2, 'transaction_Amount': '100.50', 'transaction_Date': '2024-12-11'
+    })
+
+    mock_db.executemany.assert_called_with(positions.ADD_SQL, [(7, 2, Decimal('100.50'), 1)])
+
+def test_update_transaction_moves_position(mock_db):
+    from decimal import Decimal
+    import positions
+    client = app.test_client()
+    client.put('/transactions/1', headers=admin_headers(), json={
+        'client_ID': 7, 'product_ID': 3, 'transaction_Amount': 40, 'transaction_Date': '2024-12-11'
+    })
+
+    mock_db.execute.assert_any_call(positions.REVERSE_SQL, (1,))
+    mock_db.executemany.assert_called_with(positions.ADD_SQL, [(7, 3, Decimal('40'), 1)])
+
+def test_delete_transaction_reverses_position(mock_db):
+    import positions
+    client = app.test_client()
+    client.delete('/transactions/1', headers=admin_headers())
+
+    calls = [call.args for call in mock_db.execute.call_args_list]
+    assert calls[0] == (positions.REVERSE_SQL, (1,))
+    assert calls[1] == ("DELETE FROM transactions WHERE Transaction_ID = %s", (1,))
+
+def test_rebuild_positions_command(mock_db):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-positions'])
+
+    assert 'client_positions rebuilt' in result.output
+    mock_db.execute.assert_any_call("DELETE FROM client_positions")
+
+def test_get_cash_flows(mock_db):
+    mock_db.fetchall.return_value = [(1, 7, 250, '2024-12-11')]
+    client = app.test_client()
+    response = client.get('/cash_flows?client_ID=7')
+
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {'cash_Flow_ID': 1, 'client_ID': 7, 'cash_Flow_Amount': 250, 'cash_Flow_Date': '2024-12-11'}
+    ]
+
+def test_add_cash_flows_batch_updates_rollups(mock_db):
+    import datetime
+    from decimal import Decimal
+    import cash_flows
+    from repository import CASH_FLOWS
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json=[
+        {'cash_Flow_ID': 1, 'client_ID': 7, 'cash_Flow_Amount': 100, 'cash_Flow_Date': '2024-12-11'},
+        {'cash_Flow_ID': 2, 'client_ID': 7, 'cash_Flow_Amount': -40, 'cash_Flow_Date': '2024-12-11'},
+        {'cash_Flow_ID': 3, 'client_ID': 7, 'cash_Flow_Amount': 10, 'cash_Flow_Date': '2024-12-20'},
+    ])
+
+    assert response.status_code == 201
+    assert response.get_json() == {'inserted': 3}
+    mock_db.executemany.assert_any_call(CASH_FLOWS.insert_sql, [
+        (1, 7, Decimal('100'), datetime.date(2024, 12, 11)),
+        (2, 7, Decimal('-40'), datetime.date(2024, 12, 11)),
+        (3, 7, Decimal('10'), datetime.date(2024, 12, 20)),
+    ])
+    mock_db.executemany.assert_any_call(cash_flows.ROLLUP_SQL, [
+        ('day', 7, datetime.date(2024, 12, 11), Decimal('60'), 2),
+        ('day', 7, datetime.date(2024, 12, 20), Decimal('10'), 1),
+        ('month', 7, datetime.date(2024, 12, 1), Decimal('70'), 3),
+    ])
+    mock_db.fetchone.assert_not_called()
+
+def test_add_cash_flow_invalid_date(mock_db):
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json={
+        'cash_Flow_ID': 1, 'client_ID': 7, 'cash_Flow_Amount': 100, 'cash_Flow_Date': 'soon'
+    })
+
+    assert response.status_code == 400
+    assert b"Invalid amount or date" in response.data
+
+def test_add_cash_flows_mixed_id_types(mock_db):
+    import datetime
+    from decimal import Decimal
+    import cash_flows
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json=[
+        {'cash_Flow_ID': 1, 'client_ID': 5, 'cash_Flow_Amount': 100, 'cash_Flow_Date': '2024-12-11'},
+        {'cash_Flow_ID': '2', 'client_ID': '6', 'cash_Flow_Amount': 50, 'cash_Flow_Date': '2024-12-11'},
+    ])
+
+    assert response.status_code == 201
+    mock_db.executemany.assert_any_call(cash_flows.ROLLUP_SQL, [
+        ('day', 5, datetime.date(2024, 12, 11), Decimal('100'), 1),
+        ('day', 6, datetime.date(2024, 12, 11), Decimal('50'), 1),
+        ('month', 5, datetime.date(2024, 12, 1), Decimal('100'), 1),
+        ('month', 6, datetime.date(2024, 12, 1), Decimal('50'), 1),
+    ])
+
+def test_add_cash_flow_invalid_client_id(mock_db):
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json={
+        'cash_Flow_ID': 1, 'client_ID': 'abc', 'cash_Flow_Amount': 100, 'cash_Flow_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 400
+    assert b"Invalid cash flow or client ID" in response.data
+    mock_db.executemany.assert_not_called()
+
+@pytest.mark.parametrize('client_id', [1.9, True, '1.9', [1]])
+def test_add_cash_flow_rejects_non_integer_client_id(mock_db, client_id):
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json={
+        'cash_Flow_ID': 1, 'client_ID': client_id, 'cash_Flow_Amount': 100, 'cash_Flow_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 400
+    assert b"Invalid cash flow or client ID" in response.data
+    mock_db.executemany.assert_not_called()
+
+def test_add_cash_flow_rejects_float_cash_flow_id(mock_db):
+    client = app.test_client()
+    response = client.post('/cash_flows', headers=admin_headers(), json={
+        'cash_Flow_ID': 2.5, 'client_ID': 7, 'cash_Flow_Amount': 100, 'cash_Flow_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 400
+
+def test_delete_cash_flow_not_allowed(mock_db):
+    client = app.test_client()
+    response = client.delete('/cash_flows/1', headers=admin_headers())
+
+    assert response.status_code == 405
+    assert b"append-only" in response.data
+
+def test_get_cash_flow_summary(mock_db):
+    import datetime
+    mock_db.fetchall.return_value = [(7, datetime.date(2024, 12, 1), 70, 3)]
+    client = app.test_client()
+    response = client.get('/cash_flows/summary?granularity=month&client_ID=7')
+
+    assert response.status_code == 200
+    assert response.get_json()[0]['flow_Count'] == 3
+    mock_db.execute.assert_called_with(
+        "SELECT Client_ID, Bucket_Start, Total_Amount, Flow_Count FROM cash_flow_rollups "
+        "WHERE Granularity = %s AND Client_ID = %s ORDER BY Client_ID, Bucket_Start",
+        ('month', 7)
+    )
+
+def test_add_transaction_async(mock_db, mocker):
+    submit = mocker.patch.object(app.extensions['transaction_committer'], 'submit', return_value='abc123')
+    client = app.test_client()
+    response = client.post('/transactions?async=1', headers=admin_headers(), json={
+        'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 202
+    assert response.get_json() == {'tracking_ID': 'abc123', 'status': 'queued'}
+    assert response.headers['Location'].endswith('/transactions/async/abc123')
+    submit.assert_called_once_with((1, 1, 1, Decimal(100), datetime.date(2024, 12, 11)))
+    mock_db.execute.assert_not_called()
+
+def test_add_transaction_async_queue_full(mock_db, mocker):
+    from write_behind import QueueFull
+    mocker.patch.object(app.extensions['transaction_committer'], 'submit', side_effect=QueueFull())
+    client = app.test_client()
+    response = client.post('/transactions?async=1', headers=admin_headers(), json={
+        'transaction_ID': 1, 'client_ID': 1, 'product_ID': 1, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'
+    })
+
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+def test_get_transaction_status(mocker):
+    mocker.patch.object(app.extensions['transaction_committer'], 'status', return_value={'status': 'committed'})
+    client = app.test_client()
+    response = client.get('/transactions/async/abc123')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'tracking_ID': 'abc123', 'status': 'committed'}
+
+def test_get_transactions_gzip(mock_db):
+    mock_db.fetchall.return_value = [(n, 1, 1, 100, '2024-12-11') for n in range(1, 101)]
+    client = app.test_client()
+    response = client.get('/transactions', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = gzip.decompress(response.data)
+    assert body.count(b'"transaction_ID"') == 100
+
+def test_get_transactions_gzip_not_accepted(mock_db):
+    mock_db.fetchall.return_value = [(n, 1, 1, 100, '2024-12-11') for n in range(1, 101)]
+    client = app.test_client()
+    response = client.get('/transactions', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.data.count(b'"transaction_ID"') == 100
+
+def test_get_employees_small_body_not_compressed(mock_db):
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    client = app.test_client()
+    response = client.get('/employees', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert b'John Doe' in response.data
+
+def test_get_transactions_stream_gzip(mock_db):
+    mock_db.fetchmany.side_effect = [
+        [(1, 1, 1, 100, '2024-12-11')],
+        [(2, 1, 1, 200, '2024-12-12')],
+        [],
+    ]
+    client = app.test_client()
+    response = client.get('/transactions?stream=1', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert len(lines) == 2
+    mock_db.close.assert_called()
+
+def test_metrics_endpoint(mock_db):
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    client = app.test_client()
+    client.get('/employees')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    assert b'http_requests_total{route="/employees",method="GET",status="200"}' in response.data
+    assert b'http_requests_in_flight{route="/metrics"} 1' in response.data
+
+def test_get_clients_include_manager(mock_db):
+    mock_db.fetchall.side_effect = [
+        [('clients', 4), ('employees', 2)],
+        [(1, 'John Doe', 'john@example.com', '1234567890', 5, 5, 'Ann Manager'),
+         (2, 'Jane Smith', 'jane@example.com', '0987654321', 9, None, None)],
+    ]
+    client = app.test_client()
+    response = client.get('/clients?include=manager')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data[0]['manager'] == {'employee_ID': 5, 'name': 'Ann Manager'}
+    assert data[1]['manager'] is None
+    assert response.headers['ETag'].startswith('"clients-4.2-')
+    mock_db.execute.assert_called_with(
+        "SELECT clients.Client_ID, clients.Name, clients.Email, clients.Phone, clients.Client_Manager_Employee_ID, "
+        "manager.Employee_ID, manager.Name FROM clients "
+        "LEFT JOIN employees AS manager ON manager.Employee_ID = clients.Client_Manager_Employee_ID "
+        "ORDER BY clients.Client_ID LIMIT %s", (101,)
+    )
+
+def test_get_transactions_include_client_and_product(mock_db):
+    mock_db.fetchall.side_effect = [
+        [('transactions', 1), ('clients', 1), ('products', 1)],
+        [(1, 100, 3, 'John Doe', 'john@example.com', '1234567890', 5, 7, 'Bond')],
+    ]
+    client = app.test_client()
+    response = client.get('/transactions?include=client,product&fields=transaction_Amount&client_ID=3')
+
+    assert response.get_json() == [{
+        'transaction_Amount': 100,
+        'client': {'client_ID': 3, 'name': 'John Doe', 'email': 'john@example.com',
+                   'phone': '1234567890', 'client_Manager_Employee_ID': 5},
+        'product': {'product_ID': 7, 'product_Type': 'Bond'},
+    }]
+    sql, params = mock_db.execute.call_args[0]
+    assert "LEFT JOIN clients AS client ON client.Client_ID = transactions.Client_ID" in sql
+    assert "LEFT JOIN products AS product ON product.Product_ID = transactions.Product_ID" in sql
+    assert "WHERE transactions.Client_ID = %s" in sql
+    assert params == (3, 101)
+
+def test_get_transactions_unknown_include(mock_db):
+    client = app.test_client()
+    response = client.get('/transactions?include=manager')
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Unknown include(s): manager"}
+
+def test_create_app_layers_environment_and_overrides(monkeypatch):
+    from app import create_app
+    monkeypatch.setenv("BANKING_MAX_PAGE_LIMIT", "50")
+
+    created = create_app({"DEFAULT_PAGE_LIMIT": 5})
+    created.extensions["transaction_committer"].stop()
+    response = created.test_client().get('/employees?limit=60')
+
+    assert created.config["DEFAULT_PAGE_LIMIT"] == 5
+    assert created.config["MAX_PAGE_LIMIT"] == 50
+    assert app.config["MAX_PAGE_LIMIT"] == 1000
+    assert response.status_code == 400
+
+def test_create_app_leaves_other_apps_services_alone():
+    from app import create_app
+    services = dict(app.extensions)
+
+    created = create_app({"RATE_LIMIT_PER_SECOND": 1})
+    created.extensions["transaction_committer"].stop()
+
+    for name in ("password_hasher", "token_cache", "response_cache", "row_serializer",
+                 "user_store", "transaction_committer", "slow_query_log", "admission"):
+        assert app.extensions[name] is services[name]
+        assert created.extensions[name] is not services[name] or services[name] is None
+    assert app.extensions["admission"].rate_limiter is None
+
+def test_write_returns_consistency_token_with_replicas(mock_db, mocker):
+    mocker.patch.dict(app.config, {"MYSQL_REPLICAS": [mocker.MagicMock()]})
+    mock_db.fetchone.return_value = (7,)
+    client = app.test_client()
+    response = client.post('/employees', headers=admin_headers(), json={'employee_ID': 1, 'name': 'John Doe'})
+
+    token = jwt.decode(response.headers['X-Consistency-Token'], app.config["SECRET_KEY"], algorithms=["HS256"])
+    assert (token["table"], token["version"]) == ("employees", 7)
+
+def test_consistency_token_pins_reads_until_replica_catches_up(mock_db, mocker):
+    replica = mocker.MagicMock()
+    replica.cursor.return_value.fetchone.return_value = (6,)
+    replica.cursor.return_value.fetchall.return_value = [(1, 'Old Name')]
+    mocker.patch.dict(app.config, {"MYSQL_REPLICAS": [lambda: replica]})
+    mocker.patch.dict(app.extensions, {"mysql_replicas": (None, None)})
+    mock_db.fetchone.return_value = (7,)
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    token = jwt.encode(
+        {
+            "table": "employees",
+            "version": 7,
+            "exp": datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=5),
+        },
+        app.config["SECRET_KEY"],
+        algorithm="HS256",
+    )
+    client = app.test_client()
+
+    assert b"John Doe" in client.get('/employees', headers={'X-Consistency-Token': token}).data
+    assert b"Old Name" in client.get('/employees').data
+    assert client.get('/employees', headers={'X-Consistency-Token': 'junk'}).status_code == 400
+
+def test_rate_limited_user_gets_429(mock_db, mocker):
+    from admission import AdmissionControl, RateLimiter
+    mocker.patch.dict(app.extensions, {'admission': AdmissionControl(rate_limiter=RateLimiter(rate=1, burst=1))})
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    client = app.test_client()
+
+    assert client.get('/employees', headers=admin_headers()).status_code == 200
+    response = client.get('/employees', headers=admin_headers())
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert client.get('/status').status_code == 200
+
+def test_admission_off_skips_token_decode(mock_db, mocker):
+    mock_db.fetchall.return_value = [(1, 'John Doe')]
+    validate = mocker.patch('app.validate_token')
+    client = app.test_client()
+
+    assert client.get('/employees').status_code == 200
+    validate.assert_not_called()
+
+def test_head_shares_get_route_limit(mock_db, mocker):
+    from admission import AdmissionControl, RouteLimiter
+    limiter = RouteLimiter({'GET /employees': 1})
+    mocker.patch.dict(app.extensions, {'admission': AdmissionControl(route_limiter=limiter)})
+    limiter.acquire('GET /employees')
+    client = app.test_client()
+
+    assert client.head('/employees').status_code == 503
+    limiter.release('GET /employees')
+
+def test_write_behind_commit_survives_cache_invalidation_error(mocker):
+    import app as app_module
+    pool = mocker.patch.object(app_module.mysql, 'get_pool').return_value
+    cache = mocker.MagicMock()
+    cache.invalidate.side_effect = ConnectionError("cache unreachable")
+    mocker.patch.dict(app.extensions, {'response_cache': cache})
+    mocker.patch.dict(app.config, {'CACHED_TABLES': ['transactions']})
+
+    app_module.write_transactions_behind(app, [(1, 1, 1, Decimal(100), datetime.date(2024, 12, 11))])
+
+    pool.acquire.return_value.commit.assert_called_once()
+    cache.invalidate.assert_called_once_with('transactions')
@@ -0,0 +1,158 @@
+import gzip
+import json
+import asyncio
+from decimal import Decimal
+from async_app import create_async_app
+from async_db import FakeDatabase
+from repository import encode_cursor
+
+def request(app, path, headers=None, method="GET"):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], response_headers, body
+
+def make_app(handler, **config):
+    db = FakeDatabase(handler)
+    return create_async_app(config, db=db), db
+
+def versions_then(rows):
+    def handler(sql, params):
+        if "table_versions" in sql:
+            return [(table, 3) for table in params]
+        return rows
+    return handler
+
+def test_list_matches_sync_format():
+    app, db = make_app(versions_then([(1, 'John Doe'), (2, 'Jane Smith')]))
+    status, headers, body = request(app, "/employees")
+
+    assert status == 200
+    assert body == b'[{"employee_ID":1,"name":"John Doe"},{"employee_ID":2,"name":"Jane Smith"}]\n'
+    assert headers["etag"].startswith('"employees-3-')
+    assert db.queries[-1] == ("SELECT Employee_ID, Name FROM employees ORDER BY Employee_ID LIMIT %s", (101,))
+
+def test_list_next_link_and_not_modified():
+    app, db = make_app(versions_then([(1, 1, 1, Decimal("100.00"), None), (2, 1, 1, Decimal("5.00"), None)]))
+    status, headers, _ = request(app, "/transactions?limit=1")
+
+    assert headers["link"] == f'</transactions?limit=1&after={encode_cursor(1)}>; rel="next"'
+    queries = len(db.queries)
+    status, _, body = request(app, "/transactions?limit=1", {"If-None-Match": headers["etag"]})
+    assert status == 304
+    assert body == b""
+    assert len(db.queries) == queries + 1
+
+def test_list_include_and_errors():
+    app, db = make_app(versions_then([(1, 'John', 'j@example.com', '1', 5, 5, 'Ann')]))
+    _, _, body = request(app, "/clients?include=manager")
+
+    assert json.loads(body)[0]["manager"] == {"employee_ID": 5, "name": "Ann"}
+    assert request(app, "/clients?include=product")[0] == 400
+    assert request(app, "/transactions?min_amount=abc")[2] == b'{"error":"Invalid value for min_amount"}\n'
+    assert request(app, "/products", method="POST")[0] == 405
+    assert request(app, "/nowhere")[0] == 404
+
+def test_stream_gzip():
+    app, _ = make_app(versions_then([(n, 'Product') for n in range(1, 4)]), STREAM_CHUNK_SIZE=2)
+    status, headers, body = request(app, "/products?stream=1", {"Accept-Encoding": "gzip"})
+
+    assert status == 200
+    assert headers["content-type"] == "application/x-ndjson"
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode().splitlines() == [
+        '{"product_ID":1,"product_Type":"Product"}',
+        '{"product_ID":2,"product_Type":"Product"}',
+        '{"product_ID":3,"product_Type":"Product"}',
+    ]
+
+def test_empty_stream_is_404():
+    app, _ = make_app(lambda sql, params: [])
+
+    assert request(app, "/products?stream=1")[0] == 404
+
+def test_positions_and_summary():
+    app, _ = make_app(lambda sql, params: [(7, Decimal("10.50"), 2)])
+    status, _, body = request(app, "/clients/3/positions")
+
+    assert status == 200
+    assert json.loads(body) == [{"product_ID": 7, "position_Amount": "10.50", "transaction_Count": 2}]
+    assert request(app, "/cash_flows/summary?granularity=week")[0] == 400
+
+def test_concurrent_requests_share_one_loop():
+    in_flight = []
+    peak = []
+
+    class SlowDatabase(FakeDatabase):
+        async def fetchall(self, sql, params=()):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return [(1, "Product")] if "products" in sql else [("products", 1)]
+
+    app = create_async_app(db=SlowDatabase(None))
+
+    async def many():
+        async def one():
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+            scope = {"type": "http", "method": "GET", "path": "/products", "query_string": b"", "headers": []}
+            await app(scope, None, send)
+            return messages[0]["status"]
+        return await asyncio.gather(*[one() for _ in range(200)])
+
+    assert asyncio.run(many()) == [200] * 200
+    assert max(peak) > 100
+
+def test_head_stream_sends_no_body():
+    app, _ = make_app(versions_then([(n, 'Product') for n in range(1, 4)]), STREAM_CHUNK_SIZE=2)
+    status, headers, body = request(app, "/products?stream=1", method="HEAD")
+
+    assert status == 200
+    assert headers["content-type"] == "application/x-ndjson"
+    assert body == b""
+
+def test_concurrent_first_requests_open_the_pool_once():
+    opens = []
+
+    class SlowOpenDatabase(FakeDatabase):
+        async def open(self):
+            opens.append(1)
+            await asyncio.sleep(0.01)
+            await super().open()
+
+    app = create_async_app(db=SlowOpenDatabase(versions_then([(1, "Product")])))
+
+    async def many():
+        async def one():
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+            scope = {"type": "http", "method": "GET", "path": "/products", "query_string": b"", "headers": []}
+            await app(scope, None, send)
+            return messages[0]["status"]
+        return await asyncio.gather(*[one() for _ in range(20)])
+
+    assert asyncio.run(many()) == [200] * 20
+    assert opens == [1]
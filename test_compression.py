@@ -0,0 +1,46 @@
+import gzip
+import zlib
+from flask import Response
+from compression import gzip_bytes, gzip_stream, compress_response
+
+def test_gzip_bytes_round_trip():
+    assert gzip.decompress(gzip_bytes(b'{"a":1}' * 100, 6)) == b'{"a":1}' * 100
+
+def test_gzip_stream_flushes_each_chunk():
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    stream = gzip_stream(iter(['{"id":1}\n', '{"id":2}\n']), 6)
+
+    assert decompressor.decompress(next(stream)) == b'{"id":1}\n'
+    assert decompressor.decompress(next(stream)) == b'{"id":2}\n'
+
+def test_gzip_stream_closes_source():
+    closed = []
+
+    def chunks():
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed.append(True)
+
+    stream = gzip_stream(chunks(), 6)
+    next(stream)
+    stream.close()
+
+    assert closed == [True]
+
+def test_compress_response_skips_small_bodies():
+    response = Response("[]", mimetype="application/json")
+
+    assert compress_response(response, 6, 1024) is False
+    assert response.get_data() == b"[]"
+    assert "Content-Encoding" not in response.headers
+
+def test_compress_response_weakens_etag():
+    response = Response("x" * 2048, mimetype="application/json")
+    response.set_etag("clients-1")
+
+    assert compress_response(response, 6, 1024) is True
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"clients-1"'
+    assert gzip.decompress(response.get_data()) == b"x" * 2048
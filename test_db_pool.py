@@ -0,0 +1,140 @@
+import threading
+import pytest
+import MySQLdb
+from db_pool import ConnectionPool, PoolTimeout
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.alive:
+            raise MySQLdb.OperationalError(2006, "MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+def make_pool(**kwargs):
+    options = {"min_size": 1, "max_size": 2, "timeout": 0.05, "recycle": 300, "ping": True}
+    options.update(kwargs)
+    return ConnectionPool(FakeConnection, **options)
+
+def test_reuses_released_connection():
+    pool = make_pool()
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert conn.rollbacks == 1
+    assert pool.stats()["created"] == 1
+
+def test_timeout_when_exhausted():
+    pool = make_pool(max_size=1)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+def test_waiter_gets_released_connection():
+    pool = make_pool(max_size=1, timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+
+    assert pool.acquire() is conn
+    assert pool.stats()["waits"] == 1
+
+def test_dead_connection_replaced_on_borrow():
+    pool = make_pool()
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()["size"] == 1
+
+def test_idle_connection_recycled():
+    pool = make_pool(recycle=0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is not conn
+    assert pool.stats()["recycled"] == 1
+
+def test_warm_opens_min_size():
+    pool = make_pool(min_size=2)
+    pool.warm()
+
+    stats = pool.stats()
+    assert stats["idle"] == 2
+    assert stats["in_use"] == 0
+
+def test_connection_factory_config():
+    from flask import Flask
+    from db_pool import PooledMySQL
+
+    app = Flask(__name__)
+    app.config["MYSQL_CONNECTION_FACTORY"] = FakeConnection
+    mysql = PooledMySQL(app)
+    with app.app_context():
+        conn = mysql.connection
+
+        assert isinstance(conn, FakeConnection)
+    assert mysql.get_pool(app).stats()["idle"] == 1
+
+def test_cursor_wrappers_applied_and_raw_connection_released():
+    from flask import Flask
+    from db_pool import PooledMySQL, ConnectionProxy
+
+    class CursorConnection(FakeConnection):
+        def cursor(self):
+            return "cursor"
+
+    app = Flask(__name__)
+    app.config["MYSQL_CONNECTION_FACTORY"] = CursorConnection
+    mysql = PooledMySQL(app)
+    mysql.cursor_wrappers.append(lambda cursor: ("wrapped", cursor))
+    with app.app_context():
+        conn = mysql.connection
+        wrapped = conn.cursor()
+
+        assert isinstance(conn, ConnectionProxy)
+        assert wrapped == ("wrapped", "cursor")
+    assert mysql.get_pool(app).stats()["idle"] == 1
+
+def test_pool_per_app():
+    from flask import Flask
+    from db_pool import PooledMySQL
+
+    mysql = PooledMySQL()
+    first, second = Flask(__name__), Flask(__name__)
+    for app in (first, second):
+        app.config["MYSQL_CONNECTION_FACTORY"] = FakeConnection
+        mysql.init_app(app)
+
+    assert mysql.get_pool(first) is mysql.get_pool(first)
+    assert mysql.get_pool(first) is not mysql.get_pool(second)
+
+def test_replica_set_rotates_and_skips_failed_replica():
+    from db_pool import ReplicaSet
+
+    def unreachable():
+        raise MySQLdb.OperationalError(2003, "Can't connect to MySQL server")
+
+    replicas = ReplicaSet([make_pool(), ConnectionPool(unreachable, 1, 2, 0.05, 300), make_pool()], retry_after=60)
+    picks = []
+    for _ in range(4):
+        index, conn = replicas.acquire()
+        replicas.release(index, conn)
+        picks.append(index)
+
+    assert picks == [0, 2, 2, 0]
+    assert [state["healthy"] for state in replicas.stats()] == [True, False, True]
+    assert replicas.acquire(lambda conn: False) is None
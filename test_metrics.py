@@ -0,0 +1,112 @@
+import os
+import threading
+from unittest import mock
+import pytest
+from metrics import Metrics
+
+def test_request_counters_and_latency():
+    metrics = Metrics()
+    metrics.start_request("/clients", "GET")
+    metrics.set_status(200)
+    metrics.end_request()
+
+    text = metrics.render()
+    assert 'http_requests_total{route="/clients",method="GET",status="200"} 1' in text
+    assert 'http_request_duration_seconds_count{route="/clients",method="GET"} 1' in text
+    assert 'http_requests_in_flight{route="/clients"} 0' in text
+
+def test_in_flight_gauge():
+    metrics = Metrics()
+    metrics.start_request("/transactions", "GET")
+
+    assert 'http_requests_in_flight{route="/transactions"} 1' in metrics.render()
+
+def test_missing_status_counts_as_500():
+    metrics = Metrics()
+    metrics.start_request("/clients", "GET")
+    metrics.end_request()
+
+    assert 'status="500"} 1' in metrics.render()
+
+def test_cursor_wrapper_counts_queries():
+    metrics = Metrics()
+    cursor = metrics.wrap_cursor(mock.MagicMock())
+    metrics.start_request("/transactions", "GET")
+    cursor.execute("SELECT 1")
+    cursor.execute("SELECT 2")
+    cursor.fetchall()
+    cursor.close()
+    metrics.set_status(200)
+    metrics.end_request()
+
+    text = metrics.render()
+    assert 'db_query_duration_seconds_count{route="/transactions",operation="execute"} 2' in text
+    assert 'db_query_duration_seconds_count{route="/transactions",operation="fetch"} 1' in text
+    assert 'db_queries_per_request_bucket{route="/transactions",le="2"} 1' in text
+    assert 'db_queries_per_request_bucket{route="/transactions",le="1"} 0' in text
+
+def test_shards_of_finished_threads_are_kept():
+    metrics = Metrics()
+
+    def handle():
+        metrics.start_request("/products", "GET")
+        metrics.set_status(200)
+        metrics.end_request()
+
+    threads = [threading.Thread(target=handle) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 'http_requests_total{route="/products",method="GET",status="200"} 3' in metrics.render()
+    assert metrics._shards == []
+    assert 'http_requests_total{route="/products",method="GET",status="200"} 3' in metrics.render()
+
+def test_shards_of_finished_threads_are_pruned_without_a_scrape():
+    metrics = Metrics()
+
+    def handle():
+        metrics.start_request("/products", "GET")
+        metrics.set_status(200)
+        metrics.end_request()
+
+    for _ in range(50):
+        thread = threading.Thread(target=handle)
+        thread.start()
+        thread.join()
+
+    assert len(metrics._shards) == 1
+    assert 'http_requests_total{route="/products",method="GET",status="200"} 50' in metrics.render()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_shared_directory_sums_processes_and_keeps_exited_counts(tmp_path):
+    metrics = Metrics()
+    metrics.share(str(tmp_path), interval=60)
+
+    def handle():
+        metrics.start_request("/products", "GET")
+        metrics.set_status(200)
+        metrics.end_request()
+
+    handle()
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            for _ in range(3):
+                handle()
+            metrics.start_request("/products", "GET")
+            metrics.flush()
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    assert os.waitpid(pid, 0)[1] == 0
+    handle()
+
+    for _ in range(2):
+        text = metrics.render()
+        assert 'http_requests_total{route="/products",method="GET",status="200"} 5' in text
+        assert 'http_requests_in_flight{route="/products"} 0' in text
+    assert sorted(os.listdir(tmp_path)) == [".lock", f"{os.getpid()}.json", "retired.json"]
@@ -0,0 +1,41 @@
+import threading
+import pytest
+from password_hashing import PasswordHasher, HashingPoolFull
+
+class SlowBcrypt:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def generate_password_hash(self, password):
+        self.started.set()
+        self.release.wait(5)
+        return b"hash"
+
+    def check_password_hash(self, pw_hash, password):
+        return pw_hash == "hash"
+
+def test_hash_and_check():
+    bcrypt = SlowBcrypt()
+    bcrypt.release.set()
+    hasher = PasswordHasher(bcrypt, max_workers=1, max_pending=0)
+
+    assert hasher.generate_password_hash("secret") == "hash"
+    assert hasher.check_password_hash("hash", "secret") is True
+    assert hasher.stats()["completed"] == 2
+
+def test_rejects_when_full():
+    bcrypt = SlowBcrypt()
+    hasher = PasswordHasher(bcrypt, max_workers=1, max_pending=0)
+    worker = threading.Thread(target=hasher.generate_password_hash, args=("secret",))
+    worker.start()
+    bcrypt.started.wait(5)
+
+    with pytest.raises(HashingPoolFull):
+        hasher.check_password_hash("hash", "secret")
+    assert hasher.stats()["in_flight"] == 1
+    assert hasher.stats()["rejected"] == 1
+
+    bcrypt.release.set()
+    worker.join()
+    assert hasher.stats()["in_flight"] == 0
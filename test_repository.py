@@ -0,0 +1,51 @@
+import datetime
+from decimal import Decimal
+from repository import EMPLOYEES, CLIENTS, TRANSACTIONS, validate
+
+def test_generated_sql():
+    assert EMPLOYEES.insert_sql == "INSERT INTO employees (Employee_ID, Name) VALUES (%s, %s)"
+    assert EMPLOYEES.update_sql == "UPDATE employees SET Name = %s WHERE Employee_ID = %s"
+    assert EMPLOYEES.delete_sql == "DELETE FROM employees WHERE Employee_ID = %s"
+
+def test_validate():
+    data = {'transaction_ID': 1, 'client_ID': 2, 'product_ID': 3, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'}
+
+    assert validate(TRANSACTIONS, data) == ((1, 2, 3, Decimal(100), datetime.date(2024, 12, 11)), None)
+    assert validate(TRANSACTIONS, data, with_id=False) == ((2, 3, Decimal(100), datetime.date(2024, 12, 11)), None)
+    assert validate(TRANSACTIONS, {'transaction_ID': 1}) == (None, "Missing required fields")
+    assert validate(EMPLOYEES, {'employee_ID': 1}, with_id=False) == (None, "Name is required")
+    assert validate(EMPLOYEES, None)[1] == "Employee must be a JSON object"
+
+def test_validate_rejects_bad_amount_or_date():
+    data = {'transaction_ID': 1, 'client_ID': 2, 'product_ID': 3, 'transaction_Amount': 100, 'transaction_Date': '2024-12-11'}
+
+    assert validate(TRANSACTIONS, dict(data, transaction_Amount=True)) == (None, "Invalid amount or date")
+    assert validate(TRANSACTIONS, dict(data, transaction_Amount="abc")) == (None, "Invalid amount or date")
+    assert validate(TRANSACTIONS, dict(data, transaction_Date="someday")) == (None, "Invalid amount or date")
+
+def test_parse_includes():
+    relations, error = TRANSACTIONS.parse_includes("product, client,product")
+
+    assert error is None
+    assert [relation.name for relation in relations] == ["product", "client"]
+    assert TRANSACTIONS.parse_includes("manager") == (None, "Unknown include(s): manager")
+    assert CLIENTS.relations["manager"].join_sql(CLIENTS) == \
+        "LEFT JOIN employees AS manager ON manager.Employee_ID = clients.Client_Manager_Employee_ID"
+
+def test_page_etag():
+    from repository import page_etag
+    assert page_etag('employees', None, b'limit=5') is None
+    assert page_etag('employees', 3, b'limit=5') == page_etag('employees', 3, b'limit=5')
+    assert page_etag('employees', 3, b'limit=5').startswith('employees-3-')
+    assert page_etag('employees', 3, b'limit=5') != page_etag('employees', 3, b'limit=6')
+
+def test_trim_page():
+    from repository import trim_page, encode_cursor
+    rows = [(1, 'a'), (2, 'b'), (3, 'c')]
+
+    assert trim_page(EMPLOYEES, rows, 2, None, {'fields': 'name'}) == (
+        rows[:2], {'fields': 'name', 'limit': 2, 'after': encode_cursor(2)}, None
+    )
+    assert trim_page(EMPLOYEES, rows, 3, None, {}) == (rows, None, None)
+    assert trim_page(EMPLOYEES, [], 3, None, {}) == (None, None, "No employees found")
+    assert trim_page(EMPLOYEES, [], 3, 7, {}) == ([], None, None)
@@ -0,0 +1,43 @@
+from response_cache import ResponseCache
+
+def test_get_set():
+    cache = ResponseCache(10, 60)
+    value, generation = cache.get("products", "")
+    assert value is None
+    cache.set("products", "", ["[]", None], generation)
+
+    assert cache.get("products", "") == (["[]", None], generation)
+    assert cache.stats()["hits"] == 1
+
+def test_invalidate_namespace():
+    cache = ResponseCache(10, 60)
+    cache.set("products", "", "a", 0)
+    cache.set("employees", "", "b", 0)
+    cache.invalidate("products")
+
+    assert cache.get("products", "") == (None, 1)
+    assert cache.get("employees", "") == ("b", 0)
+
+def test_set_after_invalidation_is_dropped():
+    cache = ResponseCache(10, 60)
+    _, generation = cache.get("products", "")
+    cache.invalidate("products")
+    cache.set("products", "", "read before the write", generation)
+
+    assert cache.get("products", "")[0] is None
+    assert cache.stats()["size"] == 0
+
+def test_ttl_expiry():
+    cache = ResponseCache(10, 0)
+    cache.set("products", "", "a", 0)
+
+    assert cache.get("products", "")[0] is None
+
+def test_size_limit():
+    cache = ResponseCache(2, 60)
+    cache.set("products", "1", "a", 0)
+    cache.set("products", "2", "b", 0)
+    cache.set("products", "3", "c", 0)
+
+    assert cache.get("products", "1")[0] is None
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,58 @@
+import datetime
+from decimal import Decimal
+import pytest
+from flask import Flask
+from serializers import make_serializer, TemplateSerializer
+
+SELECTED = ["transaction_ID", "client_ID", "product_ID", "transaction_Amount", "transaction_Date"]
+ROWS = [
+    (1, 7, 2, Decimal("100.50"), datetime.date(2024, 12, 11)),
+    (2, 7, None, Decimal("-3"), datetime.datetime(2024, 12, 12, 9, 30)),
+]
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    with app.app_context():
+        yield
+
+def test_template_matches_jsonify(app_context):
+    expected = make_serializer("jsonify").rows(SELECTED, SELECTED, ROWS)
+
+    assert make_serializer("template").rows(SELECTED, SELECTED, ROWS) == expected
+
+def test_template_matches_jsonify_for_projection(app_context):
+    selected = ["client_ID", "name"]
+    rows = [(1, "Zoë \"Z\" O'Neil"), (2, "Ann\n")]
+    keys = ["name"]
+
+    assert make_serializer("template").rows(selected, keys, rows) == make_serializer("jsonify").rows(selected, keys, rows)
+
+def test_template_single_row(app_context):
+    serializer = make_serializer("template")
+    expected = make_serializer("jsonify").row(SELECTED, SELECTED, ROWS[0])
+
+    assert serializer.row(SELECTED, SELECTED, ROWS[0]) == expected
+
+def test_template_empty(app_context):
+    assert make_serializer("template").rows(SELECTED, SELECTED, []) == "[]\n"
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        make_serializer("pickle")
+
+def test_template_caches_encoder_per_projection():
+    serializer = TemplateSerializer()
+    serializer.rows(SELECTED, SELECTED, ROWS)
+    serializer.rows(SELECTED, SELECTED, ROWS)
+
+    assert len(serializer._encoders) == 1
+
+def test_template_matches_jsonify_with_nested(app_context):
+    selected = ["client_ID", "name"]
+    nested = (("manager", 2, ("employee_ID", "name")),)
+    rows = [(1, "John", 5, "Ann"), (2, "Jane", None, None)]
+    expected = make_serializer("jsonify").rows(selected, selected, rows, nested)
+
+    assert make_serializer("template").rows(selected, selected, rows, nested) == expected
+    assert '"manager":null' in expected
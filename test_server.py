@@ -0,0 +1,103 @@
+import os
+import re
+import sys
+import time
+import signal
+import socket
+import threading
+import subprocess
+import urllib.request
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="server.py needs fork()")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(predicate, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+def alive(pid):
+    # Retired workers are children of the master, which reaps them.
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+@pytest.fixture
+def server():
+    port = free_port()
+    env = dict(os.environ, BANKING_CACHED_TABLES="[]")
+    proc = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--workers", "2", "--graceful-timeout", "5"],
+        cwd=HERE, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    lines = []
+    reader = threading.Thread(target=lambda: lines.extend(proc.stderr), daemon=True)
+    reader.start()
+    yield proc, port, lines
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+def ready_workers(lines):
+    return [int(pid) for pid in re.findall(r"worker (\d+) ready", "".join(lines))]
+
+def get_index(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as response:
+        return response.status
+
+def index_requests(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        text = response.read().decode("utf-8")
+    return sum(int(count) for count in re.findall(r'http_requests_total\{route="/",method="GET",status="200"\} (\d+)', text))
+
+def test_unshared_cache_disabled_with_several_workers():
+    from flask import Flask
+    from server import disable_unshared_cache
+
+    app = Flask(__name__)
+    app.config.update(CACHED_TABLES=["products"], CACHE_REDIS_URL=None)
+    disable_unshared_cache(app, 1)
+    assert app.config["CACHED_TABLES"] == ["products"]
+
+    disable_unshared_cache(app, 2)
+    assert app.config["CACHED_TABLES"] == []
+
+    app.config.update(CACHED_TABLES=["products"], CACHE_REDIS_URL="redis://cache")
+    disable_unshared_cache(app, 2)
+    assert app.config["CACHED_TABLES"] == ["products"]
+
+def test_server_reloads_workers_and_stops_cleanly(server):
+    proc, port, lines = server
+
+    wait_for(lambda: len(ready_workers(lines)) == 2)
+    old = ready_workers(lines)
+    for _ in range(6):
+        assert get_index(port) == 200
+    # Other workers publish their totals at least once a second.
+    time.sleep(1.5)
+    for _ in range(4):
+        assert index_requests(port) == 6
+
+    proc.send_signal(signal.SIGHUP)
+    wait_for(lambda: len(ready_workers(lines)) == 4)
+    new = ready_workers(lines)[2:]
+    wait_for(lambda: not any(alive(pid) for pid in old))
+    assert set(new).isdisjoint(old)
+    assert all(alive(pid) for pid in new)
+    assert proc.poll() is None
+    assert get_index(port) == 200
+
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=15) == 0
+    assert not any(alive(pid) for pid in new)
+    wait_for(lambda: f"master {proc.pid} stopped" in "".join(lines))
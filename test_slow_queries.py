@@ -0,0 +1,81 @@
+import os
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
+from slow_queries import SlowQueryLog, make_logger, statement_shape
+
+def read_entries(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_statement_shape():
+    assert statement_shape("SELECT * FROM t  WHERE id = %s AND name = 'bob' LIMIT 10") == \
+        "SELECT * FROM t WHERE id = ? AND name = ? LIMIT ?"
+    assert statement_shape("SELECT 1 FROM t WHERE id IN (%s, %s, %s)") == "SELECT ? FROM t WHERE id IN (?+)"
+
+def test_slow_statement_logged_with_redacted_params(tmp_path):
+    path = str(tmp_path / "slow.log")
+    log = SlowQueryLog(make_logger(path, 1024 * 1024, 1), threshold=0, context=lambda: {"route": "/transactions"})
+    cursor = log.wrap_cursor(mock.MagicMock(rowcount=3))
+    cursor.execute("INSERT INTO t VALUES (%s, %s)", (7, Decimal("10.50")))
+
+    entry = read_entries(path)[0]
+    assert entry["event"] == "slow_query"
+    assert entry["statement"] == "INSERT INTO t VALUES (?+)"
+    assert entry["params"] == ["int", "Decimal"]
+    assert entry["route"] == "/transactions"
+    assert entry["rowcount"] == 3
+    assert "10.50" not in json.dumps(entry)
+
+def test_fast_statement_not_logged(tmp_path):
+    path = str(tmp_path / "slow.log")
+    log = SlowQueryLog(make_logger(path, 1024 * 1024, 1), threshold=60)
+    log.wrap_cursor(mock.MagicMock()).execute("SELECT 1", None)
+
+    assert log.stats()["logged"] == 0
+
+def test_explain_once_per_shape(tmp_path):
+    path = str(tmp_path / "slow.log")
+    done = threading.Event()
+    calls = []
+
+    def explain(sql, params):
+        calls.append((sql, params))
+        done.set()
+        return [{"type": "ALL", "key": None}]
+
+    log = SlowQueryLog(make_logger(path, 1024 * 1024, 1), threshold=0, explain=explain)
+    cursor = log.wrap_cursor(mock.MagicMock())
+    cursor.execute("SELECT * FROM t WHERE id = %s", (1,))
+    cursor.execute("SELECT * FROM t WHERE id = %s", (2,))
+    cursor.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,)])
+    assert done.wait(2)
+    for _ in range(100):
+        if log.stats()["explains"]:
+            break
+        threading.Event().wait(0.01)
+
+    assert calls == [("SELECT * FROM t WHERE id = %s", (1,))]
+    entries = read_entries(path)
+    assert [entry["event"] for entry in entries].count("explain") == 1
+    insert = [entry for entry in entries if entry["statement"].startswith("INSERT")]
+    assert insert[0]["rows"] == 2
+    assert log.stats()["shapes"] == 2
+
+def test_log_reopened_after_another_process_rotates_it(tmp_path):
+    path = str(tmp_path / "slow.log")
+    log = SlowQueryLog(make_logger(path, 1024 * 1024, 1), threshold=0)
+    cursor = log.wrap_cursor(mock.MagicMock())
+    cursor.execute("SELECT 1", None)
+    os.rename(path, path + ".1")
+    cursor.execute("SELECT 2", None)
+
+    assert [entry["statement"] for entry in read_entries(path + ".1")] == ["SELECT ?"]
+    assert len(read_entries(path)) == 1
+
+def test_log_not_opened_until_first_entry(tmp_path):
+    path = str(tmp_path / "slow.log")
+    make_logger(path, 1024 * 1024, 1)
+
+    assert not os.path.exists(path)
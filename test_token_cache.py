@@ -0,0 +1,30 @@
+import time
+from token_cache import TokenCache
+
+def test_hit_and_miss():
+    cache = TokenCache(10)
+    assert cache.get("token") is None
+    cache.put("token", {"user_id": "alice", "role": "admin"}, time.time() + 60)
+
+    assert cache.get("token") == {"user_id": "alice", "role": "admin"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_expired_entry_is_dropped():
+    cache = TokenCache(10)
+    cache.put("token", {"user_id": "alice", "role": "admin"}, time.time() - 1)
+
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+def test_evicts_least_recently_used():
+    cache = TokenCache(2)
+    exp = time.time() + 60
+    cache.put("a", {"user_id": "a", "role": "user"}, exp)
+    cache.put("b", {"user_id": "b", "role": "user"}, exp)
+    cache.get("a")
+    cache.put("c", {"user_id": "c", "role": "user"}, exp)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
@@ -0,0 +1,38 @@
+import json
+import os
+from user_store import JsonUserStore
+
+def test_add_and_get(tmp_path):
+    store = JsonUserStore(str(tmp_path / "users.json"))
+
+    assert store.get("alice") is None
+    assert store.add("alice", "hash", "admin") is True
+    assert store.get("alice") == {"username": "alice", "password": "hash", "role": "admin"}
+
+def test_add_duplicate(tmp_path):
+    store = JsonUserStore(str(tmp_path / "users.json"))
+    store.add("alice", "hash", "admin")
+
+    assert store.add("alice", "other", "user") is False
+    assert store.get("alice")["password"] == "hash"
+
+def test_sees_writes_from_other_workers(tmp_path):
+    path = str(tmp_path / "users.json")
+    first = JsonUserStore(path)
+    second = JsonUserStore(path)
+    first.add("alice", "hash", "admin")
+
+    assert second.get("alice")["role"] == "admin"
+    assert second.add("alice", "hash", "user") is False
+    assert first.add("bob", "hash", "user") is True
+    assert second.get("bob") is not None
+
+def test_reads_legacy_file(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"users": [{"username": "carol", "password": "hash", "role": "user"}]}))
+    store = JsonUserStore(str(path))
+
+    assert store.get("carol")["role"] == "user"
+    store.add("dave", "hash", "user")
+    assert len(json.loads(path.read_text())["users"]) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
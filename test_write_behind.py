@@ -0,0 +1,72 @@
+import time
+import threading
+import pytest
+from write_behind import GroupCommitter, QueueFull, StatusStore
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_group_commit_by_size():
+    batches = []
+    committer = GroupCommitter(batches.append, max_queue=100, batch_size=3, flush_interval=5)
+    ids = [committer.submit(i) for i in range(3)]
+
+    wait_for(lambda: committer.status(ids[-1])["status"] == "committed")
+    assert batches == [[0, 1, 2]]
+    committer.stop()
+
+def test_group_commit_by_time():
+    batches = []
+    committer = GroupCommitter(batches.append, max_queue=100, batch_size=100, flush_interval=0.05)
+    tracking_id = committer.submit("row")
+
+    wait_for(lambda: committer.status(tracking_id)["status"] == "committed")
+    assert batches == [["row"]]
+    committer.stop()
+
+def test_failed_rows_are_isolated():
+    def write_batch(rows):
+        if "bad" in rows:
+            raise ValueError("rejected")
+
+    committer = GroupCommitter(write_batch, max_queue=100, batch_size=2, flush_interval=5)
+    good = committer.submit("good")
+    bad = committer.submit("bad")
+
+    wait_for(lambda: committer.status(bad)["status"] != "queued")
+    assert committer.status(good)["status"] == "committed"
+    assert committer.status(bad) == {"status": "failed", "error": "rejected"}
+    committer.stop()
+
+def test_queue_full():
+    release = threading.Event()
+    committer = GroupCommitter(lambda rows: release.wait(5), max_queue=1, batch_size=1, flush_interval=0)
+    committer.submit("first")
+    wait_for(lambda: committer.stats()["queued"] == 0)
+    committer.submit("second")
+
+    with pytest.raises(QueueFull):
+        committer.submit("third")
+    assert committer.stats()["rejected"] == 1
+    release.set()
+    committer.stop()
+
+def test_statuses_are_read_from_the_shared_store():
+    statuses = StatusStore()
+    accepting = GroupCommitter(lambda rows: None, max_queue=100, batch_size=1, flush_interval=0, statuses=statuses)
+    other = GroupCommitter(lambda rows: None, max_queue=100, batch_size=1, flush_interval=0, statuses=statuses)
+    tracking_id = accepting.submit("row")
+
+    wait_for(lambda: other.status(tracking_id)["status"] == "committed")
+    accepting.stop()
+
+def test_status_store_retention():
+    statuses = StatusStore(retention=2)
+    for tracking_id in ("a", "b", "c"):
+        statuses.set(tracking_id, {"status": "queued"})
+
+    assert statuses.get("a") is None
+    assert statuses.get("c") == {"status": "queued"}
@@ -0,0 +1,59 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class TokenCache:
+    """LRU cache of already-verified JWTs.
+
+    Entries are keyed by a SHA-256 digest of the raw token, so the tokens
+    themselves are never held, and each entry dies at the token's ``exp``
+    just as ``jwt.decode`` would reject it.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            exp, current_user = entry
+            if time.time() >= exp:
+                del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return dict(current_user)
+
+    def put(self, token, current_user, exp):
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, dict(current_user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
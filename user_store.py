@@ -0,0 +1,126 @@
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import MySQLdb
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on ``path`` across processes."""
+    with open(path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JsonUserStore:
+    """Users kept in a JSON file, indexed by username in memory.
+
+    The file is only re-read when its mtime or size changes, and writes go
+    through a temporary file that is renamed over the original while holding
+    a lock file, so concurrent workers never see a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._users = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self, force=False):
+        signature = self._stat_signature()
+        if not force and signature == self._signature:
+            return
+        users = {}
+        if signature is not None:
+            with open(self.path, "r") as f:
+                for user in json.load(f).get("users", []):
+                    users[user["username"]] = user
+        self._users = users
+        self._signature = signature
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".users-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"users": list(self._users.values())}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._signature = self._stat_signature()
+
+    def get(self, username):
+        with self._lock:
+            self._refresh()
+            return self._users.get(username)
+
+    def add(self, username, password_hash, role):
+        """Store a new user. Returns ``False`` if the username is taken."""
+        with self._lock, file_lock(self.lock_path):
+            # Another worker may have written since our last read.
+            self._refresh(force=True)
+            if username in self._users:
+                return False
+            self._users[username] = {"username": username, "password": password_hash, "role": role}
+            self._write()
+            return True
+
+
+class MySQLUserStore:
+    """Users kept in the ``users`` table (see migrations/001_users.sql)."""
+
+    def __init__(self, mysql):
+        self.mysql = mysql
+
+    def get(self, username):
+        cursor = self.mysql.connection.cursor()
+        cursor.execute("SELECT Username, Password, Role FROM users WHERE Username = %s", (username,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return {"username": row[0], "password": row[1], "role": row[2]}
+
+    def add(self, username, password_hash, role):
+        cursor = self.mysql.connection.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO users (Username, Password, Role) VALUES (%s, %s, %s)",
+                (username, password_hash, role)
+            )
+        except MySQLdb.IntegrityError:
+            self.mysql.connection.rollback()
+            return False
+        self.mysql.connection.commit()
+        return True
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+
+
+class QueueFull(Exception):
+    """Raised when the write-behind queue cannot take another row."""
+
+
+class StatusStore:
+    """Tracking statuses in this process, keeping the ``retention`` most recent."""
+
+    def __init__(self, retention=100000):
+        self.retention = retention
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tracking_id):
+        with self._lock:
+            entry = self._entries.get(tracking_id)
+            return dict(entry) if entry else None
+
+    def set(self, tracking_id, entry):
+        with self._lock:
+            self._entries[tracking_id] = entry
+            self._entries.move_to_end(tracking_id)
+            while len(self._entries) > self.retention:
+                self._entries.popitem(last=False)
+
+    def discard(self, tracking_id):
+        with self._lock:
+            self._entries.pop(tracking_id, None)
+
+
+class RedisStatusStore:
+    """Same interface as :class:`StatusStore`, shared through Redis.
+
+    Every worker can answer for any tracking ID, and statuses outlive a
+    restart or reload; each expires ``ttl`` seconds after its last change.
+    """
+
+    def __init__(self, url, ttl, prefix="private_banking:write_behind"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, tracking_id):
+        value = self.client.get(f"{self.prefix}:{tracking_id}")
+        return json.loads(value) if value is not None else None
+
+    def set(self, tracking_id, entry):
+        self.client.set(f"{self.prefix}:{tracking_id}", json.dumps(entry), ex=max(int(self.ttl), 1))
+
+    def discard(self, tracking_id):
+        self.client.delete(f"{self.prefix}:{tracking_id}")
+
+
+class GroupCommitter:
+    """Queues rows and writes them from a background thread in group commits.
+
+    A batch is flushed once ``batch_size`` rows are waiting or
+    ``flush_interval`` seconds after its first row arrived, whichever comes
+    first. ``write_batch(rows)`` must write and commit the rows, raising on
+    failure; a failed batch is retried row by row so that only the bad rows
+    are marked failed. Statuses go to ``statuses`` (a :class:`StatusStore`
+    by default).
+    """
+
+    def __init__(self, write_batch, max_queue, batch_size, flush_interval, statuses=None):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.statuses = statuses if statuses is not None else StatusStore()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._stopping = threading.Event()
+        self._committed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._batches = 0
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so each worker process starts its own.
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="group-committer", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _set_status(self, tracking_id, status, error=None):
+        entry = {"status": status}
+        if error:
+            entry["error"] = error
+        self.statuses.set(tracking_id, entry)
+
+    def submit(self, row):
+        """Queue ``row`` and return its tracking ID; raises :class:`QueueFull`."""
+        self._ensure_started()
+        tracking_id = uuid.uuid4().hex
+        self._set_status(tracking_id, "queued")
+        try:
+            self._queue.put_nowait((tracking_id, row))
+        except queue.Full:
+            self.statuses.discard(tracking_id)
+            with self._lock:
+                self._rejected += 1
+            raise QueueFull()
+        return tracking_id
+
+    def status(self, tracking_id):
+        return self.statuses.get(tracking_id)
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        try:
+            self.write_batch([row for _, row in batch])
+        except Exception:
+            for tracking_id, row in batch:
+                try:
+                    self.write_batch([row])
+                except Exception as exc:
+                    self._set_status(tracking_id, "failed", str(exc))
+                    with self._lock:
+                        self._failed += 1
+                else:
+                    self._set_status(tracking_id, "committed")
+                    with self._lock:
+                        self._committed += 1
+        else:
+            for tracking_id, _ in batch:
+                self._set_status(tracking_id, "committed")
+            with self._lock:
+                self._committed += len(batch)
+        with self._lock:
+            self._batches += 1
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def stop(self, timeout=10):
+        """Drain the queue and stop the background thread."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and self._thread_pid == os.getpid():
+            thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "committed": self._committed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "batches": self._batches,
+            }